@@ -28,18 +28,85 @@ Environment:
 import os
 import sys
 import json
-import subprocess
+import asyncio
+import base64
+import functools
+import hashlib
+import importlib
+import importlib.util
 import time
+import random
 import re
-import shutil
+import sqlite3
+import string
+import stat
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import argparse
-import requests
 from dataclasses import dataclass, asdict
 from enum import Enum
 
 
+class _LazyModule:
+    """Stand-in that imports the named module on first attribute access (keeps CLI startup fast)"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+# Only needed once the pipeline runs; --config and early validation exits never import them
+requests = _LazyModule("requests")
+subprocess = _LazyModule("subprocess")
+shutil = _LazyModule("shutil")
+
+
+def _pooled_session(pool_connections: int, pool_maxsize: int, **retry) -> "requests.Session":
+    """requests.Session with a keep-alive HTTPS pool and urllib3 Retry(**retry)"""
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=Retry(**retry)
+    ))
+    return session
+
+try:
+    import httpx  # optional: pooled async HTTP for concurrent AI calls
+except ImportError:
+    httpx = None
+
+try:
+    import orjson  # optional: faster JSON for plans and requirements
+except ImportError:
+    orjson = None
+
+try:
+    import diskcache  # optional: persistent cache for GitHub metadata lookups
+except ImportError:
+    diskcache = None
+
+
+def _dump_json_bytes(obj) -> bytes:
+    """Serialize obj as indented UTF-8 JSON, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def _load_json_bytes(data: bytes):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
 class Stage(Enum):
     """Development stages"""
     SCOPE = "scope"
@@ -60,6 +127,12 @@ class Config:
     github_repo: Optional[str] = None
     output_dir: str = "./generated_webapp"
     max_iterations: int = 10
+    batch_api: bool = False  # Anthropic Message Batches: ~50% cheaper, but results can take minutes
+    batch_poll_interval: int = 10
+    max_concurrency: int = 8  # in-flight AI requests for batched build/verify calls
+    copy_concurrency: int = min(8, (os.cpu_count() or 2) * 2)  # worker threads for the deploy flatten copy
+    max_history_turns: int = 6  # prompt/response pairs kept after the context prefix
+    response_cache: bool = True  # reuse responses to byte-identical requests (not used for scope)
 
     @property
     def api_base_url(self) -> str:
@@ -70,54 +143,194 @@ class Config:
             return "https://api.anthropic.com/v1/messages"
 
 
+class _SqliteTTLCache:
+    """Minimal stand-in for diskcache.Cache (get/set with expire) when diskcache is not installed"""
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(directory / "cache.sqlite3"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+        self._db.commit()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < time.time():
+            return default
+        return json.loads(row[0])
+
+    def set(self, key: str, value, expire: float):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + expire)
+            )
+            self._db.commit()
+
+
+class ResponseCache:
+    """
+    SQLite-backed store of AI responses keyed on a sha256 of the exact request (provider,
+    model, conversation, system prompt and prompt). Only the newest max_entries are kept.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 2000):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS exact_responses (key TEXT PRIMARY KEY, response TEXT, created REAL)"
+        )
+        self._db.commit()
+
+    @staticmethod
+    def _key(context: str, prompt: str, system: str) -> str:
+        return hashlib.sha256(json.dumps([context, system, prompt]).encode("utf-8")).hexdigest()
+
+    def get(self, context: str, prompt: str, system: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT response FROM exact_responses WHERE key = ?", (self._key(context, prompt, system),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, context: str, prompt: str, system: str, response: str):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO exact_responses (key, response, created) VALUES (?, ?, ?)",
+                (self._key(context, prompt, system), response, time.time())
+            )
+            self._db.execute(
+                "DELETE FROM exact_responses WHERE key NOT IN "
+                "(SELECT key FROM exact_responses ORDER BY created DESC LIMIT ?)", (self.max_entries,)
+            )
+            self._db.commit()
+
+
 class AIClient:
     """Client for interacting with AI API (supports Anthropic and OpenAI)"""
 
     def __init__(self, config: Config):
         self.config = config
-        self.conversation_history: List[Dict[str, str]] = []
+        # Stable project context shared by every stage, followed by the current stage's turns
+        self.prefix_messages: List[Dict[str, object]] = []
+        self.turns: List[Dict[str, object]] = []
+        # Pooled keep-alive connections; auth headers stay per-request so the session can be shared
+        self.session = _pooled_session(
+            16, 16, total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset({"GET", "POST"})
+        )
+        self.cache: Optional[ResponseCache] = None
+        if config.response_cache:
+            self.cache = ResponseCache(Path.home() / ".webappgen" / "response_cache.sqlite3")
 
-    def _call_anthropic(self, prompt: str, system_prompt: str = None) -> str:
-        """Make an API call to Anthropic Messages API"""
-        headers = {
+    @property
+    def conversation_history(self) -> List[Dict[str, object]]:
+        return self.prefix_messages + self.turns
+
+    def _log_cache_usage(self, cached_tokens: Optional[int]):
+        """Report prompt-cache hits returned in the provider usage block"""
+        if cached_tokens:
+            print(f"   ⚡ Prompt cache hit: {cached_tokens} input tokens")
+
+    def _post_json(self, headers: Dict[str, str], payload: Dict[str, object]) -> Dict:
+        response = self.session.post(
+            self.config.api_base_url,
+            headers=headers,
+            json=payload,
+            timeout=120
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _anthropic_headers(self) -> Dict[str, str]:
+        return {
             "x-api-key": self.config.api_key,
             "anthropic-version": "2023-06-01",
+            "anthropic-beta": "prompt-caching-2024-07-31",
             "content-type": "application/json"
         }
 
-        messages = self.conversation_history + [{"role": "user", "content": prompt}]
-        payload = {
+    def _anthropic_payload(self, prompt: str, system_prompt: str, history: List[Dict[str, object]]) -> Dict[str, object]:
+        messages = history + [{"role": "user", "content": prompt}]
+        payload: Dict[str, object] = {
             "model": self.config.model_id,
             "max_tokens": 4096,  # Anthropic uses max_tokens for 2023-06-01 version
             "messages": messages
         }
         if system_prompt:
-            payload["system"] = system_prompt
-
-        response = requests.post(
-            self.config.api_base_url,
-            headers=headers,
-            json=payload,
-            timeout=120
-        )
-        response.raise_for_status()
-        result = response.json()
+            # Static stage prompts are marked cacheable so repeat calls skip prefill
+            payload["system"] = [
+                {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+            ]
+        return payload
+
+    def _parse_anthropic(self, result: Dict) -> str:
+        self._log_cache_usage((result.get("usage") or {}).get("cache_read_input_tokens"))
         try:
             return result["content"][0]["text"]
         except Exception:
             return json.dumps(result)
 
-    def _call_openai(self, prompt: str, system_prompt: str = None) -> str:
-        """Make an API call to OpenAI Chat Completions"""
-        headers = {
+    def _call_anthropic(self, prompt: str, system_prompt: str = None) -> str:
+        """Make an API call to Anthropic Messages API"""
+        payload = self._anthropic_payload(prompt, system_prompt, self.conversation_history)
+        return self._parse_anthropic(self._post_json(self._anthropic_headers(), payload))
+
+    def _call_anthropic_batch(self, prompts: List[str], system_prompt: str = None) -> List[str]:
+        """Submit prompts through the Anthropic Message Batches API and wait for the results"""
+        payloads = [self._anthropic_payload(prompt, system_prompt, self.conversation_history) for prompt in prompts]
+        return [text or "" for text in self._run_anthropic_batch(payloads, self._parse_anthropic)]
+
+    def _run_anthropic_batch(self, payloads: List[Dict[str, object]], parse) -> List[Optional[object]]:
+        """Submit Messages API payloads as one Message Batch; parse(message) per result, None where a request failed"""
+        batches_url = f"{self.config.api_base_url}/batches"
+        headers = self._anthropic_headers()
+        body = {"requests": [{"custom_id": f"req-{i}", "params": payload} for i, payload in enumerate(payloads)]}
+        response = self.session.post(batches_url, headers=headers, json=body, timeout=120)
+        response.raise_for_status()
+        batch = response.json()
+
+        while batch.get("processing_status") != "ended":
+            time.sleep(self.config.batch_poll_interval)
+            response = self.session.get(f"{batches_url}/{batch['id']}", headers=headers, timeout=30)
+            response.raise_for_status()
+            batch = response.json()
+
+        results: List[Optional[object]] = [None] * len(payloads)
+        response = self.session.get(batch["results_url"], headers=headers, timeout=120)
+        response.raise_for_status()
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            index = int(entry["custom_id"].split("-", 1)[1])
+            result = entry.get("result") or {}
+            if result.get("type") == "succeeded":
+                results[index] = parse(result["message"])
+            else:
+                print(f"❌ Batch request {entry['custom_id']} {result.get('type', 'failed')}")
+        return results
+
+    def _openai_headers(self) -> Dict[str, str]:
+        return {
             "Authorization": f"Bearer {self.config.api_key}",
             "Content-Type": "application/json"
         }
 
+    def _openai_payload(self, prompt: str, system_prompt: str, history: List[Dict[str, object]]) -> Dict[str, object]:
+        # Static instructions go first so OpenAI's automatic prefix caching can reuse them
         messages: List[Dict[str, str]] = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
-        messages.extend(self.conversation_history)
+        for message in history:
+            content = message["content"]
+            if isinstance(content, list):
+                # OpenAI has no cache_control; flatten Anthropic-style content blocks to text
+                content = "\n".join(block.get("text", "") for block in content)
+            messages.append({"role": message["role"], "content": content})
         messages.append({"role": "user", "content": prompt})
 
         payload: Dict[str, object] = {
@@ -132,42 +345,260 @@ class AIClient:
             payload["max_completion_tokens"] = 4096
         else:
             payload["max_tokens"] = 4096
+        return payload
 
-        response = requests.post(
-            self.config.api_base_url,
-            headers=headers,
-            json=payload,
-            timeout=120
-        )
-        response.raise_for_status()
-        result = response.json()
+    def _parse_openai(self, result: Dict) -> str:
+        usage = result.get("usage") or {}
+        self._log_cache_usage((usage.get("prompt_tokens_details") or {}).get("cached_tokens"))
         try:
             return result["choices"][0]["message"]["content"]
         except Exception:
             return json.dumps(result)
 
-    def call(self, prompt: str, system_prompt: str = None) -> str:
-        """Make an API call to the configured AI service and track history"""
-        try:
-            if self.config.provider.lower() == "openai":
-                assistant_message = self._call_openai(prompt, system_prompt)
-            else:
-                assistant_message = self._call_anthropic(prompt, system_prompt)
+    def _call_openai(self, prompt: str, system_prompt: str = None) -> str:
+        """Make an API call to OpenAI Chat Completions"""
+        payload = self._openai_payload(prompt, system_prompt, self.conversation_history)
+        return self._parse_openai(self._post_json(self._openai_headers(), payload))
 
-            self.conversation_history.append({"role": "user", "content": prompt})
-            self.conversation_history.append({"role": "assistant", "content": assistant_message})
+    def _report_error(self, e: Exception):
+        print(f"❌ API Error: {e}")
+        if hasattr(e, 'response') and e.response is not None:
+            try:
+                print(f"   Response: {e.response.text}")
+            except Exception:
+                pass
+
+    def _cache_context(self, history: List[Dict[str, object]]) -> str:
+        """Key cached responses on provider, model and the exact conversation they were sent in"""
+        blob = json.dumps([self.config.provider, self.config.model_id, history], sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _cache_get(self, prompt: str, system_prompt: Optional[str], history: List[Dict[str, object]]) -> Optional[str]:
+        if self.cache is None:
+            return None
+        hit = self.cache.get(self._cache_context(history), prompt, system_prompt or "")
+        if hit is not None:
+            print("   ♻️  Reused cached AI response")
+        return hit
+
+    def _cache_put(self, prompt: str, system_prompt: Optional[str], history: List[Dict[str, object]], response: str):
+        if self.cache is not None and response:
+            self.cache.put(self._cache_context(history), prompt, system_prompt or "", response)
+
+    def call(self, prompt: str, system_prompt: str = None, cacheable: bool = True) -> str:
+        """
+        Make an API call to the configured AI service and track history.
+        With cacheable=False the response cache is bypassed (e.g. for interactive stages).
+        """
+        try:
+            history = list(self.conversation_history)
+            assistant_message = self._cache_get(prompt, system_prompt, history) if cacheable else None
+            if assistant_message is None:
+                if self.config.provider.lower() == "openai":
+                    assistant_message = self._call_openai(prompt, system_prompt)
+                else:
+                    assistant_message = self._call_anthropic(prompt, system_prompt)
+                if cacheable:
+                    self._cache_put(prompt, system_prompt, history, assistant_message)
+
+            self.turns.append({"role": "user", "content": prompt})
+            self.turns.append({"role": "assistant", "content": assistant_message})
+            # Sliding window: drop the oldest pairs so prefill stays bounded as a stage goes on
+            overflow = len(self.turns) - 2 * self.config.max_history_turns
+            if overflow > 0:
+                del self.turns[:overflow]
             return assistant_message
         except Exception as e:
-            print(f"❌ API Error: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    print(f"   Response: {e.response.text}")
-                except Exception:
-                    pass
+            self._report_error(e)
             return ""
 
+    async def acall(self, prompt: str, system_prompt: str = None, client=None,
+                    history: Optional[List[Dict[str, object]]] = None) -> str:
+        """
+        Async, history-free variant of call(). Uses an httpx.AsyncClient when one is
+        given, otherwise runs the blocking request in a worker thread.
+        """
+        history = list(self.conversation_history if history is None else history)
+        cached = self._cache_get(prompt, system_prompt, history)
+        if cached is not None:
+            return cached
+        if self.config.provider.lower() == "openai":
+            headers = self._openai_headers()
+            payload = self._openai_payload(prompt, system_prompt, history)
+            parse = self._parse_openai
+        else:
+            headers = self._anthropic_headers()
+            payload = self._anthropic_payload(prompt, system_prompt, history)
+            parse = self._parse_anthropic
+
+        if client is None:
+            result = await asyncio.to_thread(self._post_json, headers, payload)
+        else:
+            response = await client.post(self.config.api_base_url, headers=headers, json=payload)
+            response.raise_for_status()
+            result = response.json()
+        text = parse(result)
+        self._cache_put(prompt, system_prompt, history, text)
+        return text
+
+    async def acall_many(self, prompts: List[str], system_prompt: str = None) -> List[str]:
+        """Run acall() over prompts concurrently, at most config.max_concurrency in flight"""
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        # Every prompt sees the same snapshot of the history, whatever order they finish in
+        history = list(self.conversation_history)
+        client = None
+        if httpx is not None:
+            client = httpx.AsyncClient(timeout=120, http2=importlib.util.find_spec("h2") is not None)
+
+        async def worker(prompt: str) -> str:
+            async with semaphore:
+                try:
+                    return await self.acall(prompt, system_prompt, client=client, history=history)
+                except Exception as e:
+                    self._report_error(e)
+                    return ""
+
+        try:
+            return list(await asyncio.gather(*(worker(p) for p in prompts)))
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    def _structured_payload(self, prompt: str, system_prompt: Optional[str], history: List[Dict[str, object]],
+                            name: str, schema: Dict[str, object]) -> Dict[str, object]:
+        """Request a JSON reply matching schema: json_schema response_format on OpenAI, a forced tool on Anthropic"""
+        if self.config.provider.lower() == "openai":
+            payload = self._openai_payload(prompt, system_prompt, history)
+            payload["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": name, "schema": schema, "strict": True}
+            }
+        else:
+            payload = self._anthropic_payload(prompt, system_prompt, history)
+            payload["tools"] = [{"name": name, "description": "Submit the result.", "input_schema": schema}]
+            payload["tool_choice"] = {"type": "tool", "name": name}
+        return payload
+
+    def _parse_structured(self, result: Dict) -> Optional[Dict]:
+        if self.config.provider.lower() == "openai":
+            text = self._parse_openai(result)
+            return _extract_first_json(text, '{') if text else None
+        self._log_cache_usage((result.get("usage") or {}).get("cache_read_input_tokens"))
+        for block in result.get("content") or []:
+            if block.get("type") == "tool_use":
+                return block.get("input")
+        return None
+
+    async def acall_structured(self, prompt: str, name: str, schema: Dict[str, object], system_prompt: str = None,
+                               client=None, history: Optional[List[Dict[str, object]]] = None) -> Optional[Dict]:
+        """History-free call whose reply is a JSON object for schema, or None if none was returned"""
+        history = list(self.conversation_history if history is None else history)
+        cache_prompt = f"[{name}]\n{prompt}"
+        cached = self._cache_get(cache_prompt, system_prompt, history)
+        if cached is not None:
+            return json.loads(cached)
+        headers = self._openai_headers() if self.config.provider.lower() == "openai" else self._anthropic_headers()
+        payload = self._structured_payload(prompt, system_prompt, history, name, schema)
+
+        if client is None:
+            result = await asyncio.to_thread(self._post_json, headers, payload)
+        else:
+            response = await client.post(self.config.api_base_url, headers=headers, json=payload)
+            response.raise_for_status()
+            result = response.json()
+        data = self._parse_structured(result)
+        if isinstance(data, dict):
+            self._cache_put(cache_prompt, system_prompt, history, json.dumps(data))
+        return data
+
+    async def _acall_structured_many(self, prompts: List[str], name: str, schema: Dict[str, object],
+                                     system_prompt: str = None) -> List[Optional[Dict]]:
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        history = list(self.conversation_history)
+        client = None
+        if httpx is not None:
+            client = httpx.AsyncClient(timeout=120, http2=importlib.util.find_spec("h2") is not None)
+
+        async def worker(prompt: str) -> Optional[Dict]:
+            async with semaphore:
+                try:
+                    return await self.acall_structured(prompt, name, schema, system_prompt, client=client, history=history)
+                except Exception as e:
+                    self._report_error(e)
+                    return None
+
+        try:
+            return list(await asyncio.gather(*(worker(p) for p in prompts)))
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    def call_structured(self, prompts: List[str], name: str, schema: Dict[str, object],
+                        system_prompt: str = None) -> List[Optional[Dict]]:
+        """
+        Structured-output counterpart of call_many(): one JSON object per prompt, in
+        prompt order, or None where the request failed or returned no object.
+        """
+        if not prompts:
+            return []
+        if self.config.batch_api and self.config.provider.lower() != "openai":
+            try:
+                return self._call_structured_batch(prompts, name, schema, system_prompt)
+            except Exception as e:
+                self._report_error(e)
+                return [None] * len(prompts)
+        return asyncio.run(self._acall_structured_many(prompts, name, schema, system_prompt))
+
+    def _call_structured_batch(self, prompts: List[str], name: str, schema: Dict[str, object],
+                               system_prompt: str = None) -> List[Optional[Dict]]:
+        """call_structured() through Message Batches; cached replies are reused and only misses are submitted"""
+        history = list(self.conversation_history)
+        results: List[Optional[Dict]] = [None] * len(prompts)
+        misses: List[int] = []
+        for i, prompt in enumerate(prompts):
+            cached = self._cache_get(f"[{name}]\n{prompt}", system_prompt, history)
+            if cached is not None:
+                results[i] = json.loads(cached)
+            else:
+                misses.append(i)
+        if misses:
+            payloads = [self._structured_payload(prompts[i], system_prompt, history, name, schema) for i in misses]
+            for i, data in zip(misses, self._run_anthropic_batch(payloads, self._parse_structured)):
+                if isinstance(data, dict):
+                    results[i] = data
+                    self._cache_put(f"[{name}]\n{prompts[i]}", system_prompt, history, json.dumps(data))
+        return results
+
+    def call_many(self, prompts: List[str], system_prompt: str = None) -> List[str]:
+        """
+        Send independent prompts that share the current history in one round.
+        Responses are returned in prompt order and are not added to the history;
+        failed prompts yield "" like call().
+        """
+        if not prompts:
+            return []
+        if self.config.batch_api and self.config.provider.lower() != "openai":
+            try:
+                return self._call_anthropic_batch(prompts, system_prompt)
+            except Exception as e:
+                self._report_error(e)
+                return [""] * len(prompts)
+        return asyncio.run(self.acall_many(prompts, system_prompt))
+
+    def set_context_block(self, text: str):
+        """Replace the cacheable project-context prefix that every later call is sent after"""
+        self.prefix_messages = [{
+            "role": "user",
+            "content": [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+        }]
+
+    def trim_to_prefix(self):
+        """Drop the current stage's turns but keep the project-context prefix warm in the provider cache"""
+        self.turns = []
+
     def reset_conversation(self):
-        self.conversation_history = []
+        self.prefix_messages = []
+        self.turns = []
 
 
 class WorkPlan:
@@ -178,16 +609,18 @@ class WorkPlan:
         self.output_dir = output_dir
         self.plan_file = output_dir / f"{stage.value}_plan.json"
         self.todos: List[Dict] = []
+        self._dirty = False
 
     def save(self):
         self.plan_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.plan_file, 'w', encoding='utf-8') as f:
-            json.dump(self.todos, f, indent=2)
+        with open(self.plan_file, 'wb') as f:
+            f.write(_dump_json_bytes(self.todos))
+        self._dirty = False
 
     def load(self) -> bool:
         if self.plan_file.exists():
-            with open(self.plan_file, 'r', encoding='utf-8') as f:
-                self.todos = json.load(f)
+            with open(self.plan_file, 'rb') as f:
+                self.todos = _load_json_bytes(f.read())
             return True
         return False
 
@@ -206,8 +639,13 @@ class WorkPlan:
             if todo["id"] == todo_id:
                 todo["status"] = "completed"
                 todo["completed_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                self._dirty = True
                 break
-        self.save()
+
+    def flush(self):
+        """Write the plan if todos were completed since the last save"""
+        if self._dirty:
+            self.save()
 
     def get_pending_todos(self) -> List[Dict]:
         return [t for t in self.todos if t["status"] == "pending"]
@@ -216,10 +654,321 @@ class WorkPlan:
         return len(self.get_pending_todos()) == 0
 
 
+# Build-stage prompt templates, filled per todo with a prebuilt criteria block
+_RETRY_PROMPT_TMPL = string.Template("""Please provide the complete file contents for this task using this EXACT format:
+
+FILENAME: path/to/file.html
+```html
+<html>
+... complete file content ...
+</html>
+```
+
+FILENAME: path/to/file.css
+```css
+/* complete CSS content */
+```
+
+Task: $title
+Description: $description""")
+
+_VERIFY_PROMPT_TMPL = string.Template("""Review the work completed for this task:
+
+Task: $title
+Acceptance Criteria:
+$criteria
+
+Files created for this task: $files
+
+$contents
+
+Given the file contents above, does this meet all acceptance criteria?
+Respond with JSON:
+{"met": true/false, "issues": ["list", "of", "issues"]}""")
+
+_STRUCTURED_BUILD_PROMPT_TMPL = string.Template("""Complete this build task:
+
+Task: $title
+Description: $description
+Acceptance Criteria:
+$criteria
+
+Follow the project requirements provided above.
+
+Return every file needed (HTML, CSS, JS, etc.) with its path relative to the project root
+and its complete contents. Then check your files against each acceptance criterion and
+report whether all are met, listing any issues.""")
+
+# Reply envelope for structured build calls (strict-mode compatible: all keys required)
+_BUILD_RESULT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "files": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"path": {"type": "string"}, "content": {"type": "string"}},
+                "required": ["path", "content"],
+                "additionalProperties": False
+            }
+        },
+        "acceptance": {
+            "type": "object",
+            "properties": {"met": {"type": "boolean"}, "issues": {"type": "array", "items": {"type": "string"}}},
+            "required": ["met", "issues"],
+            "additionalProperties": False
+        }
+    },
+    "required": ["files", "acceptance"],
+    "additionalProperties": False
+}
+
+
+def _valid_build_result(result) -> bool:
+    """Check a structured build reply against _BUILD_RESULT_SCHEMA"""
+    if not isinstance(result, dict):
+        return False
+    files, acceptance = result.get("files"), result.get("acceptance")
+    return (
+        isinstance(files, list) and len(files) > 0
+        and all(isinstance(f, dict) and isinstance(f.get("path"), str) and isinstance(f.get("content"), str) for f in files)
+        and isinstance(acceptance, dict) and isinstance(acceptance.get("met"), bool)
+        and isinstance(acceptance.get("issues", []), list)
+    )
+
+
 # Allowed file constraints for sanitization
 ALLOWED_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".png", ".jpg", ".jpeg", ".gif", ".ico"}
 ALLOWED_TOP_DIRS = {"", "assets", "css", "js", "images", "img", "static"}
 
+# File-extraction helpers. Label lines are matched one line at a time, never against
+# the whole response.
+_FENCE = "```"
+_FILE_EXTS = r"html|css|js|json|svg|png|jpg|jpeg|gif|ico"
+_FENCE_INFO_RE = re.compile(r"(\w*)\s*(.*)")
+_HEADER_LINE_RE = re.compile(r"#+\s*(?:File:|Filename:)?\s*`?(.+?\.(?:%s))`?\s*$" % _FILE_EXTS)
+_COMMENT_LINE_RE = re.compile(
+    r"\s*(?:(?://|#|<!--)\s*(.+?\.(?:%s))|([a-zA-Z0-9_\-/.]+\.(?:%s)))\s*(?:-->)?\s*$" % (_FILE_EXTS, _FILE_EXTS)
+)
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_first_json(text: str, opener: str = '{'):
+    """
+    Decode the first JSON value starting at an `opener` character in text, parsing it once
+    with raw_decode instead of slicing to the last closer. Returns None if text has no
+    opener; raises the first JSONDecodeError if no candidate decodes.
+    """
+    idx = text.find(opener)
+    first_error: Optional[json.JSONDecodeError] = None
+    while idx >= 0:
+        try:
+            return _JSON_DECODER.raw_decode(text, idx)[0]
+        except json.JSONDecodeError as e:
+            first_error = first_error or e
+        idx = text.find(opener, idx + 1)
+    if first_error is not None:
+        raise first_error
+    return None
+
+
+def _iter_file_blocks(response: str) -> Iterator[Tuple[Optional[str], str, str, bool]]:
+    """
+    Walk the ``` fences of an AI response once, yielding (path, body, lang, explicit).
+    The path comes from a preceding "FILENAME:" or markdown header line, or from a
+    filename comment on the fence or first body line; it is None for unlabelled blocks.
+    explicit is True only for "FILENAME:" labels.
+    """
+    pos = 0
+    while True:
+        start = response.find(_FENCE, pos)
+        if start < 0:
+            return
+        eol = response.find("\n", start)
+        if eol < 0:
+            return
+        end = response.find(_FENCE, eol + 1)
+        if end < 0:
+            return
+
+        lang, info_rest = _FENCE_INFO_RE.match(response, start + 3, eol).groups()
+        body = response[eol + 1:end]
+        # The label, if any, is the last non-blank line between the previous block and this fence
+        before = response[pos:start].rstrip()
+        label = before[before.rfind("\n") + 1:].strip()
+        pos = end + len(_FENCE)
+
+        if "FILENAME:" in label:
+            yield label.split("FILENAME:", 1)[1].strip().strip("`"), body, lang, True
+            continue
+        m = _HEADER_LINE_RE.match(label)
+        if m:
+            yield m.group(1).strip().strip("`"), body, lang, False
+            continue
+        m = _COMMENT_LINE_RE.match(info_rest)
+        if m:
+            yield (m.group(1) or m.group(2)).strip(), body, lang, False
+            continue
+        first_line, _, rest = body.partition("\n")
+        m = _COMMENT_LINE_RE.match(first_line)
+        if m:
+            yield (m.group(1) or m.group(2)).strip(), rest, lang, False
+            continue
+        yield None, body, lang, False
+
+
+# Filename sanitization patterns
+_COMMENT_SPLIT_RE = re.compile(r"\s+\(|`")
+_LABEL_RE = re.compile(r"^(?:file:|filename:)\s*", re.IGNORECASE)
+_BADCHARS_RE = re.compile(r"[^A-Za-z0-9._\-/]")
+_SLASHES_RE = re.compile(r"/{2,}")
+# Paths that _sanitize_filepath_cached would return unchanged
+_CLEAN_PATH_RE = re.compile(
+    r"(?:(?:assets|css|js|images|img|static)/)?[A-Za-z0-9_\-][A-Za-z0-9._\-]*\.(?:%s)" % _FILE_EXTS
+)
+
+
+@functools.lru_cache(maxsize=1024)
+def _sanitize_filepath_cached(raw: str) -> Optional[str]:
+    """
+    Convert a raw filename (possibly with comments/backticks) to a safe, canonical path.
+    Examples:
+      "index.html` (header updated for branding)" -> "index.html"
+      "about.html`" -> "about.html"
+      "assets/icon.svg (dark mode)" -> "assets/icon.svg"
+    """
+    if not raw:
+        return None
+
+    s = raw.strip().strip('`"\'')
+    s = s.replace("\\", "/")
+
+    # Strip trailing commentary like: ` (something)` or after a backtick, etc.
+    s = _COMMENT_SPLIT_RE.split(s, maxsplit=1)[0].strip()
+
+    # Remove leading "File:" or "Filename:" labels if present
+    s = _LABEL_RE.sub("", s)
+
+    # Remove any disallowed characters; keep [A-Za-z0-9._\-/]
+    s = _BADCHARS_RE.sub("", s)
+
+    # Collapse repeated slashes and strip root markers
+    s = _SLASHES_RE.sub("/", s)
+    s = s.lstrip("/.")
+
+    if not s:
+        return None
+
+    p = Path(s)
+    # Validate extension
+    if p.suffix.lower() not in ALLOWED_EXTENSIONS:
+        return None
+
+    # Restrict top-level directory
+    parts = p.parts
+    if len(parts) > 1 and parts[0] not in ALLOWED_TOP_DIRS:
+        ext = p.suffix.lower()
+        if ext in {".css"}:
+            p = Path("css") / p.name
+        elif ext in {".js"}:
+            p = Path("js") / p.name
+        elif ext in {".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg"}:
+            p = Path("assets") / p.name
+        else:
+            p = Path(p.name)
+
+    return str(p)
+
+
+# git push failures worth retrying (network trouble, server-side 5xx), as opposed to rejections
+_TRANSIENT_GIT_RE = re.compile(
+    r"Could not resolve host|Connection (?:timed out|reset|refused)|Operation timed out|early EOF"
+    r"|RPC failed|returned error: 5\d\d",
+    re.IGNORECASE
+)
+
+
+def _parse_push_porcelain(stdout: str) -> List[Tuple[str, str, str]]:
+    """
+    Parse `git push --porcelain` ref lines into (flag, refspec, summary) tuples. Flags:
+    ' ' fast-forward, '+' forced, '-' deleted, '*' new ref, '!' rejected, '=' up to date.
+    """
+    refs = []
+    for line in stdout.splitlines():
+        parts = line.split("\t")
+        if len(parts) >= 3 and len(parts[0]) == 1:
+            refs.append((parts[0], parts[1], parts[2]))
+    return refs
+
+
+def _retry_hint(result) -> Optional[float]:
+    """Seconds the server asked us to wait (0 if unspecified) for a transient failure, None for a final result"""
+    if isinstance(result, requests.Response):
+        if result.status_code == 429 or result.status_code >= 500:
+            try:
+                return float(result.headers.get("Retry-After", 0))
+            except ValueError:
+                return 0.0
+        return None
+    if isinstance(result, subprocess.CompletedProcess):
+        if result.returncode != 0 and _TRANSIENT_GIT_RE.search(result.stderr or ""):
+            return 0.0
+    return None
+
+
+def _retry(fn, max_retries: int = 3, base_delay: float = 1.0, max_delay: float = 30.0, jitter: float = 0.5):
+    """
+    Call fn() and retry transient failures with exponential backoff and jitter: connection
+    errors and timeouts, 429/5xx responses (honouring Retry-After) and network-level git
+    errors. Other results, including 4xx responses, are returned as-is.
+    """
+    for attempt in range(max_retries + 1):
+        hint = 0.0
+        try:
+            result = fn()
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            if attempt == max_retries:
+                raise
+        else:
+            hint = _retry_hint(result)
+            if hint is None or attempt == max_retries:
+                return result
+        delay = min(max_delay, base_delay * 2 ** attempt) * (1 + random.uniform(0, jitter))
+        time.sleep(max(delay, hint))
+
+
+def _copy_file_fast(src: str, dst: str, st: Optional[os.stat_result] = None):
+    """
+    Copy src to dst with os.sendfile on Linux (kernel-side, no userspace buffer) and
+    shutil.copyfileobj elsewhere. Mode and times come from st, or from a single fstat of
+    the open source, and are applied through the destination fd, so no path is stat'ed twice.
+    """
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        if st is None:
+            st = os.fstat(fin.fileno())
+        copied = False
+        if sys.platform.startswith("linux"):
+            try:
+                offset = 0
+                while offset < st.st_size:
+                    sent = os.sendfile(fout.fileno(), fin.fileno(), offset, st.st_size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                copied = True
+            except OSError:
+                fout.truncate(0)
+        if not copied:
+            fin.seek(0)
+            fout.seek(0)
+            shutil.copyfileobj(fin, fout, 1024 * 1024)
+        fout.flush()
+        fd = fout.fileno()
+        os.chmod(fd if os.chmod in os.supports_fd else dst, stat.S_IMODE(st.st_mode))
+        os.utime(fd if os.utime in os.supports_fd else dst, ns=(st.st_atime_ns, st.st_mtime_ns))
+
 
 class WebAppGenerator:
     """Main generator class"""
@@ -228,7 +977,23 @@ class WebAppGenerator:
         self.config = config
         self.ai = AIClient(config)
         self.output_dir = Path(config.output_dir)
+        self._output_dir_resolved = self.output_dir.resolve()
+        self._file_inventory: Optional[List[Path]] = None
+        # GitHub API session: keep-alive connections, auth set once, transparent retries on gateway errors
+        self._http = _pooled_session(4, 8, total=3, backoff_factor=1, status_forcelist=[502, 503, 504])
+        self._http.headers.update({"Accept": "application/vnd.github.v3+json"})
+        if config.github_token:
+            self._http.headers["Authorization"] = f"token {config.github_token}"
+        # GitHub locations for this app, formatted once; the remote URL carries no credentials
+        self._repo_base = f"https://api.github.com/repos/{config.github_username}/{config.github_repo}"
+        self._remote_url = f"https://github.com/{config.github_username}/{config.github_repo}.git"
+        self._site_url = f"https://{config.github_username}.github.io/{config.github_repo}"
+        # Short-lived on-disk cache for GitHub lookups that rarely change between calls or runs
+        http_cache_dir = Path.home() / ".webappgen" / "http_cache"
+        self._gh_cache = diskcache.Cache(str(http_cache_dir)) if diskcache is not None else _SqliteTTLCache(http_cache_dir)
+        self._last_pages_status: Optional[str] = None
         self.requirements: Dict = {}
+        self._requirements_json = "{}"  # serialized once per update, reused by prompts and requirements.json
         self.current_stage = Stage.SCOPE
         self.deployed_url: Optional[str] = None
 
@@ -236,10 +1001,14 @@ class WebAppGenerator:
     # Helper functions
     # --------------------
 
+    def _set_requirements(self, requirements: Dict):
+        self.requirements = requirements
+        self._requirements_json = _dump_json_bytes(requirements).decode("utf-8")
+
     def _safe_join(self, base: Path, *paths: str) -> Path:
         """Join and ensure the result stays within base (prevent path traversal)."""
         candidate = base.joinpath(*paths).resolve()
-        base_resolved = base.resolve()
+        base_resolved = self._output_dir_resolved if base == self.output_dir else base.resolve()
         try:
             # Python 3.9+: Path.is_relative_to
             if not candidate.is_relative_to(base_resolved):  # type: ignore[attr-defined]
@@ -250,91 +1019,119 @@ class WebAppGenerator:
         return candidate
 
     def _sanitize_filepath(self, raw: str) -> Optional[str]:
+        """Convert a raw filename to a safe, canonical path (see _sanitize_filepath_cached)."""
+        if raw and _CLEAN_PATH_RE.fullmatch(raw):
+            return raw
+        return _sanitize_filepath_cached(raw)
+
+    def _list_all_files(self, start: Path) -> List[Path]:
         """
-        Convert a raw filename (possibly with comments/backticks) to a safe, canonical path.
-        Examples:
-          "index.html` (header updated for branding)" -> "index.html"
-          "about.html`" -> "about.html"
-          "assets/icon.svg (dark mode)" -> "assets/icon.svg"
+        Recursively list files under start, pruning .git and other hidden directories
+        before descending into them. The listing of output_dir is cached until the next _save_file.
         """
-        if not raw:
-            return None
+        if start == self.output_dir and self._file_inventory is not None:
+            return list(self._file_inventory)
 
-        s = raw.strip().strip('`"\'')
-        s = s.replace("\\", "/")
+        files: List[Path] = []
+        for root, dirnames, filenames in os.walk(start, topdown=True):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            root_path = Path(root)
+            files.extend(root_path / name for name in filenames)
 
-        # Strip trailing commentary like: ` (something)` or after a backtick, etc.
-        s = re.split(r"\s+\(|`", s, maxsplit=1)[0].strip()
-
-        # Remove leading "File:" or "Filename:" labels if present
-        s = re.sub(r"^(?:file:|filename:)\s*", "", s, flags=re.IGNORECASE)
-
-        # Remove any disallowed characters; keep [A-Za-z0-9._\-/]
-        s = re.sub(r"[^A-Za-z0-9._\-/]", "", s)
-
-        # Collapse repeated slashes and strip root markers
-        s = re.sub(r"/{2,}", "/", s)
-        s = s.lstrip("/.")
-
-        if not s:
-            return None
-
-        p = Path(s)
-        # Validate extension
-        if p.suffix.lower() not in ALLOWED_EXTENSIONS:
-            return None
-
-        # Restrict top-level directory
-        parts = p.parts
-        if len(parts) > 1 and parts[0] not in ALLOWED_TOP_DIRS:
-            ext = p.suffix.lower()
-            if ext in {".css"}:
-                p = Path("css") / p.name
-            elif ext in {".js"}:
-                p = Path("js") / p.name
-            elif ext in {".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg"}:
-                p = Path("assets") / p.name
-            else:
-                p = Path(p.name)
-
-        return str(p)
-
-    def _list_all_files(self, start: Path) -> List[Path]:
-        return [p for p in start.rglob("*") if p.is_file() and ".git" not in str(p)]
+        if start == self.output_dir:
+            self._file_inventory = files
+            return list(files)
+        return files
 
     def _choose_best_app_dir(self) -> Optional[Path]:
         """
         Choose a directory containing index.html that likely represents the built app.
         Heuristic: directory with index.html and the most total files.
         """
-        candidates: List[Tuple[int, Path]] = []
-        for idx in self.output_dir.rglob("index.html"):
-            app_dir = idx.parent
-            files = self._list_all_files(app_dir)
-            score = len(files)
-            candidates.append((score, app_dir))
-        if not candidates:
+        files = self._list_all_files(self.output_dir)
+        # One pass: every directory holding an index.html is a candidate, scored by
+        # the number of files in its subtree
+        scores: Dict[Path, int] = {p.parent: 0 for p in files if p.name == "index.html"}
+        if not scores:
             return None
-        candidates.sort(reverse=True, key=lambda x: x[0])
-        return candidates[0][1]
+        for p in files:
+            for parent in p.parents:
+                if parent in scores:
+                    scores[parent] += 1
+                if parent == self.output_dir:
+                    break
+        return max(scores.items(), key=lambda item: item[1])[0]
+
+    def _fast_copytree(self, src: Path, dst: Path, files: Optional[List[Path]] = None) -> int:
+        """
+        Copy files under src into dst, merging. By default every file is copied, hidden
+        directories (.well-known, .github, ...) included; only .git is skipped, since the caller
+        may delete src afterwards. Destination directories are created serially, then files are
+        copied on a pool of config.copy_concurrency threads. Returns the number of files copied.
+        """
+        if files is None:
+            files = []
+            for root, dirnames, filenames in os.walk(src, topdown=True):
+                dirnames[:] = [d for d in dirnames if d != ".git"]
+                files.extend(Path(root) / name for name in filenames)
+        jobs = [(str(p), str(dst / p.relative_to(src))) for p in files]
+
+        for dst_dir in {os.path.dirname(target) for _, target in jobs}:
+            os.makedirs(dst_dir, exist_ok=True)
+
+        copied = 0
+        with ThreadPoolExecutor(max_workers=max(1, self.config.copy_concurrency)) as pool:
+            futures = {pool.submit(_copy_file_fast, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    copied += 1
+                except OSError as e:
+                    print(f"   ⚠️  Could not copy {futures[future]}: {e}")
+        return copied
+
+    def _gh_cache_key(self, method: str, url: str, body: Optional[Dict] = None) -> str:
+        blob = json.dumps(body, sort_keys=True).encode("utf-8") if body is not None else b""
+        return f"{method} {url} {self.config.github_username} {hashlib.sha256(blob).hexdigest()}"
 
-    def _get_pages_build_status(self, user: str, repo: str, token: str) -> Optional[str]:
+    def _git_auth_env(self) -> Dict[str, str]:
+        """
+        Environment that makes git send the token as an HTTP header for this process only,
+        so it is never written to .git/config or shown in the process list.
+        """
+        credentials = base64.b64encode(f"x-access-token:{self.config.github_token}".encode("utf-8")).decode("ascii")
+        env = dict(os.environ)
+        env.update({
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.https://github.com/.extraheader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+            "GIT_TERMINAL_PROMPT": "0"
+        })
+        return env
+
+    def _get_pages_build_status(self) -> Optional[str]:
         """
         Returns 'building', 'built', 'errored', or None if unknown/unavailable.
+        Terminal statuses are cached on disk for a few seconds; while a build is in progress
+        every call hits the API.
         """
-        url = f"https://api.github.com/repos/{user}/{repo}/pages/builds/latest"
-        headers = {
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github.v3+json"
-        }
+        url = f"{self._repo_base}/pages/builds/latest"
+        key = self._gh_cache_key("GET", url)
+        if self._last_pages_status in ("built", "errored"):
+            cached = self._gh_cache.get(key)
+            if cached:
+                return cached
+        status = None
         try:
-            r = requests.get(url, headers=headers, timeout=10)
+            r = self._http.get(url, timeout=10)
             if r.status_code == 200:
                 data = r.json()
-                return (data.get("status") or "").lower()
+                status = (data.get("status") or "").lower()
+                self._gh_cache.set(key, status, expire=5)
         except Exception:
             pass
-        return None
+        self._last_pages_status = status
+        return status
 
     # --------------------
     # Stages
@@ -395,7 +1192,7 @@ Return a JSON object with these keys:
 - content: object describing content needs"""
             else:
                 print("\nCurrent requirements:")
-                print(json.dumps(self.requirements, indent=2))
+                print(self._requirements_json)
 
                 user_input = input("\n✏️  Refine requirements (or 'approve' to continue): ").strip()
 
@@ -404,24 +1201,21 @@ Return a JSON object with these keys:
                     return True
 
                 prompt = f"""Current requirements:
-{json.dumps(self.requirements, indent=2)}
+{self._requirements_json}
 
 User feedback: {user_input}
 
 Update the requirements JSON based on this feedback."""
 
-            response = self.ai.call(prompt, system_prompt)
+            response = self.ai.call(prompt, system_prompt, cacheable=False)
 
             # Extract JSON from response
             try:
-                start_idx = response.find('{')
-                end_idx = response.rfind('}') + 1
-                if start_idx >= 0 and end_idx > start_idx:
-                    json_str = response[start_idx:end_idx]
-                    self.requirements = json.loads(json_str)
-                else:
+                requirements = _extract_first_json(response, '{')
+                if requirements is None:
                     print("⚠️  Could not parse AI response as JSON")
                     continue
+                self._set_requirements(requirements)
             except json.JSONDecodeError:
                 print("⚠️  Invalid JSON in AI response")
                 continue
@@ -429,8 +1223,8 @@ Update the requirements JSON based on this feedback."""
             # Save requirements
             req_file = self.output_dir / "requirements.json"
             req_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(req_file, 'w', encoding='utf-8') as f:
-                json.dump(self.requirements, f, indent=2)
+            with open(req_file, 'wb') as f:
+                f.write(self._requirements_json.encode("utf-8"))
 
         print("\n⚠️  Max iterations reached. Using current requirements.")
         return True
@@ -441,15 +1235,17 @@ Update the requirements JSON based on this feedback."""
         print(f"🔨 STAGE 2: BUILD")
         print(f"{'='*80}\n")
 
-        self.ai.reset_conversation()
+        self.ai.trim_to_prefix()
+        # Requirements are sent once as a cached preamble shared by the build, test and
+        # document stages; prompts below refer to them by name
+        self.ai.set_context_block(f"Project requirements:\n{self._requirements_json}")
         plan = WorkPlan(Stage.BUILD, self.output_dir)
 
         # Generate work plan
         print("📝 Creating build plan...")
         system_prompt = """You are a senior full-stack developer. Create a comprehensive build plan."""
 
-        prompt = f"""Based on these requirements, create a detailed build plan:
-{json.dumps(self.requirements, indent=2)}
+        prompt = f"""Based on the project requirements above, create a detailed build plan.
 
 Return a JSON array of todo items. Each item should have:
 - title: short task title
@@ -461,10 +1257,8 @@ Focus on creating actual files: HTML, CSS, JavaScript, assets, etc."""
 
         # Parse todos
         try:
-            start_idx = response.find('[')
-            end_idx = response.rfind(']') + 1
-            if start_idx >= 0 and end_idx > start_idx:
-                todos_json = json.loads(response[start_idx:end_idx])
+            todos_json = _extract_first_json(response, '[')
+            if todos_json is not None:
                 for todo_data in todos_json:
                     plan.add_todo(
                         todo_data.get("title", "Task"),
@@ -478,176 +1272,233 @@ Focus on creating actual files: HTML, CSS, JavaScript, assets, etc."""
 
         print(f"✅ Created {len(plan.todos)} build tasks\n")
 
-        # Execute build plan
-        completed_count = 0
-        for todo in plan.todos:
-            print(f"\n🔧 Working on: {todo['title']}")
-            print(f"   {todo['description']}")
-
-            prompt = f"""Complete this build task:
-
-Task: {todo['title']}
-Description: {todo['description']}
-Acceptance Criteria:
-{chr(10).join('- ' + c for c in todo['acceptance_criteria'])}
-
-Requirements context:
-{json.dumps(self.requirements, indent=2)}
-
-Provide the complete file contents needed. Format as:
-FILENAME: path/to/file
-```language
-file contents here
-```
-
-Create all necessary files (HTML, CSS, JS, etc.)."""
-
-            response = self.ai.call(prompt, system_prompt)
-
-            # Parse and save files for this response only; only retry if zero saved this call
-            files_saved = self._extract_and_save_files(response)
-
-            if files_saved == 0:
-                print(f"   ℹ️  Couldn’t parse files from the response. Requesting explicit file format...")
-                retry_prompt = f"""Please provide the complete file contents for this task using this EXACT format:
-
-FILENAME: path/to/file.html
-```html
-<html>
-... complete file content ...
-</html>
-```
-
-FILENAME: path/to/file.css
-```css
-/* complete CSS content */
-```
-
-Task: {todo['title']}
-Description: {todo['description']}"""
-
-                response = self.ai.call(retry_prompt, system_prompt)
-                self._extract_and_save_files(response)
+        # Execute build plan: one structured call per todo returns its files together with a
+        # self-check against the acceptance criteria. Todos are independent, so they go as one batch.
+        todos = plan.todos
+        criteria_blocks = {todo['id']: "\n".join("- " + c for c in todo['acceptance_criteria']) for todo in todos}
+        build_prompts = {
+            todo['id']: _STRUCTURED_BUILD_PROMPT_TMPL.substitute(
+                title=todo['title'], description=todo['description'], criteria=criteria_blocks[todo['id']]
+            )
+            for todo in todos
+        }
 
-            # Verify acceptance criteria (non-blocking)
-            print("   ✓ Checking acceptance criteria...")
-            verify_prompt = f"""Review the work completed for this task:
+        print(f"🔧 Requesting files for {len(todos)} tasks...")
+        results = dict(zip(build_prompts, self.ai.call_structured(
+            list(build_prompts.values()), "submit_build", _BUILD_RESULT_SCHEMA, system_prompt
+        )))
+        rejected = [todo for todo in todos if not _valid_build_result(results[todo['id']])]
+        if rejected:
+            print(f"\n🔁 Retrying {len(rejected)} tasks whose reply did not match the schema...")
+            retried = self.ai.call_structured(
+                [build_prompts[todo['id']] for todo in rejected], "submit_build", _BUILD_RESULT_SCHEMA, system_prompt
+            )
+            for todo, result in zip(rejected, retried):
+                results[todo['id']] = result
 
-Task: {todo['title']}
-Acceptance Criteria:
-{chr(10).join('- ' + c for c in todo['acceptance_criteria'])}
+        saved_by_todo: Dict[int, List[str]] = {}
+        acceptance: Dict[int, Optional[Dict]] = {}
+        fallback_todos: List[Dict] = []
+        for todo in todos:
+            print(f"\n🔧 Working on: {todo['title']}")
+            print(f"   {todo['description']}")
 
-Given the files created in the project directory, does this meet all acceptance criteria?
-Respond with JSON:
-{{"met": true/false, "issues": ["list", "of", "issues"]}}"""
+            result = results[todo['id']]
+            if not _valid_build_result(result):
+                print(f"   ℹ️  No valid structured reply. Requesting explicit file format...")
+                saved_by_todo[todo['id']] = []
+                fallback_todos.append(todo)
+                continue
 
-            verify_response = self.ai.call(verify_prompt, system_prompt)
+            pending: Dict[str, Tuple[str, str]] = {}
+            for entry in result["files"]:
+                self._stage_file(pending, entry["path"], entry["content"].rstrip())
+            saved_by_todo[todo['id']] = self._write_files(pending)
+            acceptance[todo['id']] = result["acceptance"]
+
+        if fallback_todos:
+            # Plain-text path for models without structured output: explicit FILENAME format,
+            # then a separate verify call per todo
+            retry_prompts = [
+                _RETRY_PROMPT_TMPL.substitute(title=todo['title'], description=todo['description'])
+                for todo in fallback_todos
+            ]
+            for todo, response in zip(fallback_todos, self.ai.call_many(retry_prompts, system_prompt)):
+                print(f"\n🔧 Retry: {todo['title']}")
+                self._extract_and_save_files(response, saved_by_todo[todo['id']])
+
+            verify_prompts = [
+                _VERIFY_PROMPT_TMPL.substitute(
+                    title=todo['title'],
+                    criteria=criteria_blocks[todo['id']],
+                    files=', '.join(saved_by_todo[todo['id']]) or 'none',
+                    contents=self._review_contents(saved_by_todo[todo['id']])
+                )
+                for todo in fallback_todos
+            ]
+            for todo, verify_response in zip(fallback_todos, self.ai.call_many(verify_prompts, system_prompt)):
+                try:
+                    acceptance[todo['id']] = _extract_first_json(verify_response, '{')
+                except json.JSONDecodeError:
+                    acceptance[todo['id']] = None
 
-            try:
-                start = verify_response.find('{')
-                end = verify_response.rfind('}') + 1
-                result = json.loads(verify_response[start:end])
-                if result.get("met", False):
-                    print(f"   ✅ Task completed successfully")
-                else:
-                    print(f"   ⚠️  Issues found: {', '.join(result.get('issues', []))}")
-                plan.complete_todo(todo['id'])
-                completed_count += 1
-            except Exception as e:
-                print(f"   ✅ Task completed (verification unclear: {e})")
-                plan.complete_todo(todo['id'])
-                completed_count += 1
+        # Report acceptance criteria (non-blocking)
+        print("\n   ✓ Checking acceptance criteria...")
+        completed_count = 0
+        for todo in todos:
+            print(f"\n🔎 {todo['title']}")
+            result = acceptance.get(todo['id'])
+            if not isinstance(result, dict):
+                print(f"   ✅ Task completed (verification unclear)")
+            elif result.get("met", False):
+                print(f"   ✅ Task completed successfully")
+            else:
+                print(f"   ⚠️  Issues found: {', '.join(result.get('issues', []))}")
+            plan.complete_todo(todo['id'])
+            completed_count += 1
 
+        plan.flush()
         print(f"\n✅ Build stage complete: {completed_count}/{len(plan.todos)} tasks finished")
         return True
 
-    def _extract_and_save_files(self, response: str) -> int:
-        """Extract file contents from AI response and save them. Returns number of files saved."""
-        files_saved = 0
-
-        # Pattern 1: FILENAME: followed by code block
-        pattern1 = r'FILENAME:\s*([^\n]+)\s*```[\w]*\n(.*?)```'
-        matches = re.findall(pattern1, response, re.DOTALL)
-        for filepath, content in matches:
-            filepath = filepath.strip().strip('`')
-            self._save_file(filepath, content.rstrip())
-            files_saved += 1
-
-        # Pattern 2: Code blocks with inline filename comments (// filename.js)
-        pattern2 = r'```[\w]*\s*(?://|#|<!--)\s*([^\n]+?\.(?:html|css|js|json|svg|png|jpg|jpeg|gif|ico))\s*(?:-->)?\s*\n(.*?)```'
-        matches = re.findall(pattern2, response, re.DOTALL)
-        for filepath, content in matches:
-            filepath = filepath.strip()
-            if not (self.output_dir / filepath).exists():
-                self._save_file(filepath, content.rstrip())
-                files_saved += 1
-
-        # Pattern 3: Markdown-style file headers
-        pattern3 = r'#+\s*(?:File:|Filename:)?\s*`?([^\n]+?\.(?:html|css|js|json|svg))`?\s*\n```[\w]*\n(.*?)```'
-        matches = re.findall(pattern3, response, re.DOTALL)
-        for filepath, content in matches:
-            filepath = filepath.strip().strip('`')
-            if not (self.output_dir / filepath).exists():
-                self._save_file(filepath, content.rstrip())
-                files_saved += 1
+    def _review_contents(self, paths: List[str], max_chars: int = 8000) -> str:
+        """Saved files as FILENAME blocks for a verify prompt, each cut to max_chars"""
+        blocks = []
+        for rel in paths:
+            try:
+                text = self._safe_join(self.output_dir, rel).read_text(encoding='utf-8', errors='replace')
+            except Exception:
+                continue
+            if len(text) > max_chars:
+                text = text[:max_chars] + "\n... (truncated)"
+            blocks.append(f"FILENAME: {rel}\n```\n{text}\n```")
+        return "\n\n".join(blocks) or "(no files were saved)"
 
-        # Pattern 4: Direct file paths in code blocks
-        pattern4 = r'```[\w]*\s*\n(?:\/\/|#|<!--)?\s*([a-zA-Z0-9_\-\/\.]+\.(?:html|css|js|json|svg|png|jpg|jpeg|gif|ico))\s*(?:-->)?\s*\n(.*?)```'
-        matches = re.findall(pattern4, response, re.DOTALL)
-        for filepath, content in matches:
-            filepath = filepath.strip()
-            if not (self.output_dir / filepath).exists():
-                self._save_file(filepath, content.rstrip())
+    def _extract_and_save_files(self, response: str, saved_paths: Optional[List[str]] = None) -> int:
+        """
+        Extract file contents from AI response and save them. Returns number of files saved.
+        Sanitized paths of the saved files are appended to saved_paths when given.
+        """
+        files_saved = 0
+        pending: Dict[str, Tuple[str, str]] = {}  # sanitized path -> (raw path, content); later blocks win
+
+        def save(filepath: str, content: str):
+            self._stage_file(pending, filepath, content)
+
+        # Single pass over the fences. FILENAME: blocks always win; blocks labelled by
+        # headers or filename comments never overwrite a file already taken from this response.
+        unlabelled: List[Tuple[str, str]] = []
+        for filepath, content, lang, explicit in _iter_file_blocks(response):
+            if filepath is None:
+                unlabelled.append((lang, content))
+            elif explicit or self._sanitize_filepath(filepath) not in pending:
+                save(filepath, content.rstrip())
                 files_saved += 1
 
         # Fallback: infer from language
         if files_saved == 0:
-            code_blocks = re.findall(r'```(\w+)\n(.*?)```', response, re.DOTALL)
-            for lang, content in code_blocks:
+            for lang, content in unlabelled:
                 if lang == 'html' and '<html' in content.lower():
-                    self._save_file('index.html', content.rstrip())
+                    save('index.html', content.rstrip())
                     files_saved += 1
                 elif lang == 'css':
-                    self._save_file('styles.css', content.rstrip())
+                    save('styles.css', content.rstrip())
                     files_saved += 1
                 elif lang in ('javascript', 'js'):
-                    self._save_file('script.js', content.rstrip())
+                    save('script.js', content.rstrip())
                     files_saved += 1
 
+        written = self._write_files(pending)
+        if saved_paths is not None:
+            saved_paths.extend(written)
+
         if files_saved == 0:
             print("   ℹ️  No files could be extracted from the AI response. Saved raw response to debug_response.txt")
             debug_file = self.output_dir / "debug_response.txt"
             debug_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(debug_file, 'a', encoding='utf-8') as f:
-                f.write(f"\n\n{'='*80}\n")
-                f.write(f"Response at {time.strftime('%Y-%m-%d %H:%M:%S')}:\n")
-                f.write(response)
-                f.write(f"\n{'='*80}\n")
+            with open(debug_file, 'ab') as f:
+                f.write(f"\n\n{'='*80}\nResponse at {time.strftime('%Y-%m-%d %H:%M:%S')}:\n".encode('utf-8'))
+                f.write(response.encode('utf-8'))
+                f.write(f"\n{'='*80}\n".encode('utf-8'))
 
         return files_saved
 
-    def _save_file(self, filepath: str, content: str):
-        """Save a file to the output directory with sanitization and safety."""
+    def _write_atomic(self, full_path: Path, data: bytes):
+        """Write via a temp file in the same directory and rename, so a crash never leaves a half-written file."""
+        with tempfile.NamedTemporaryFile(dir=full_path.parent, prefix=f".{full_path.name}.", suffix=".tmp", delete=False) as tmp:
+            tmp.write(data)
+        try:
+            os.chmod(tmp.name, 0o644)
+            os.replace(tmp.name, full_path)
+        except Exception:
+            os.unlink(tmp.name)
+            raise
+
+    def _prepare_save(self, filepath: str, content: str) -> Optional[str]:
+        """Validate a file about to be saved. Returns its sanitized path, or None if it must be skipped."""
         if not content or not content.strip():
             print(f"   ⚠️  Skipped empty file (no content). Raw name: {filepath}")
-            return
+            return None
 
         sanitized = self._sanitize_filepath(filepath)
         if not sanitized:
             print(f"   ℹ️  Skipped file with unsupported or invalid path: {filepath}")
-            return
+            return None
 
         if sanitized != filepath:
             print(f"   ℹ️  Normalized filename: '{filepath}' -> '{sanitized}'")
+        return sanitized
 
-        try:
-            full_path = self._safe_join(self.output_dir, sanitized)
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(full_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            print(f"   💾 Saved: {sanitized} ({len(content)} chars)")
-        except Exception as e:
-            print(f"   ❌ Failed to save '{filepath}' as '{sanitized}': {e}")
+    def _stage_file(self, pending: Dict[str, Tuple[str, str]], filepath: str, content: str):
+        """Queue a validated file for _write_files; a later file with the same path replaces an earlier one"""
+        sanitized = self._prepare_save(filepath, content)
+        if sanitized:
+            pending.pop(sanitized, None)
+            pending[sanitized] = (filepath, content)
+
+    def _write_files(self, files: Dict[str, Tuple[str, str]]) -> List[str]:
+        """
+        Write {sanitized path: (raw path, content)} concurrently on a small thread pool,
+        creating each parent directory once. Returns the sanitized paths written, in order.
+        """
+        if not files:
+            return []
+        self._file_inventory = None
+
+        targets: Dict[str, Path] = {}
+        for sanitized, (filepath, _) in files.items():
+            try:
+                targets[sanitized] = self._safe_join(self.output_dir, sanitized)
+            except Exception as e:
+                print(f"   ❌ Failed to save '{filepath}' as '{sanitized}': {e}")
+        for parent in {path.parent for path in targets.values()}:
+            parent.mkdir(parents=True, exist_ok=True)
+
+        def write(sanitized: str) -> Optional[Exception]:
+            try:
+                self._write_atomic(targets[sanitized], files[sanitized][1].encode('utf-8'))
+                return None
+            except Exception as e:
+                return e
+
+        written: List[str] = []
+        with ThreadPoolExecutor(max_workers=min(8, len(targets)) or 1) as pool:
+            for sanitized, error in zip(targets, pool.map(write, targets)):
+                filepath, content = files[sanitized]
+                if error is None:
+                    print(f"   💾 Saved: {sanitized} ({len(content)} chars)")
+                    written.append(sanitized)
+                else:
+                    print(f"   ❌ Failed to save '{filepath}' as '{sanitized}': {error}")
+        return written
+
+    def _save_file(self, filepath: str, content: str) -> Optional[str]:
+        """Save a file to the output directory with sanitization and safety. Returns the sanitized path if written."""
+        sanitized = self._prepare_save(filepath, content)
+        if not sanitized:
+            return None
+        written = self._write_files({sanitized: (filepath, content)})
+        return written[0] if written else None
 
     def run_test_stage(self) -> bool:
         """Stage 3: Test the application"""
@@ -655,23 +1506,22 @@ Respond with JSON:
         print(f"🧪 STAGE 3: TEST")
         print(f"{'='*80}\n")
 
-        self.ai.reset_conversation()
+        self.ai.trim_to_prefix()
         plan = WorkPlan(Stage.TEST, self.output_dir)
 
         # Generate test plan
         print("📝 Creating test plan...")
         system_prompt = """You are a QA engineer. Create a comprehensive test plan."""
 
-        prompt = f"""Create a test plan for this web app:
-{json.dumps(self.requirements, indent=2)}
+        prompt = """Create a test plan for the web app described in the project requirements above.
 
 Return a JSON array of test items with title, description, and acceptance_criteria."""
         response = self.ai.call(prompt, system_prompt)
 
         try:
-            start_idx = response.find('[')
-            end_idx = response.rfind(']') + 1
-            todos_json = json.loads(response[start_idx:end_idx])
+            todos_json = _extract_first_json(response, '[')
+            if todos_json is None:
+                raise ValueError("no JSON array in response")
             for todo_data in todos_json:
                 plan.add_todo(
                     todo_data.get("title", "Test"),
@@ -723,6 +1573,7 @@ Return a JSON array of test items with title, description, and acceptance_criter
                 plan.complete_todo(todo['id'])
                 completed_count += 1
 
+        plan.flush()
         print(f"\n✅ Test stage complete: {completed_count}/{len(plan.todos)} tests finished")
         return True
 
@@ -732,7 +1583,7 @@ Return a JSON array of test items with title, description, and acceptance_criter
         print(f"📚 STAGE 4: DOCUMENT")
         print(f"{'='*80}\n")
 
-        self.ai.reset_conversation()
+        self.ai.trim_to_prefix()
         plan = WorkPlan(Stage.DOCUMENT, self.output_dir)
 
         plan.add_todo(
@@ -749,8 +1600,7 @@ Return a JSON array of test items with title, description, and acceptance_criter
 
             system_prompt = """You are a technical writer. Create clear, comprehensive documentation."""
 
-            prompt = f"""Create a README.md for this web app:
-{json.dumps(self.requirements, indent=2)}
+            prompt = """Create a README.md for the web app described in the project requirements above.
 
 Include:
 - Project title and description
@@ -771,8 +1621,59 @@ Format as markdown."""
             print(f"   ✅ Created README.md")
             plan.complete_todo(todo['id'])
 
+        plan.flush()
         return plan.is_complete()
 
+    def _git_init_and_commit(self, plan: WorkPlan):
+        """Deploy step 2: init the repo in output_dir and commit everything"""
+        try:
+            subprocess.run(["git", "init"], check=True, capture_output=True, text=True, cwd=self.output_dir)
+
+            # Stage all changes including deletions
+            subprocess.run(["git", "add", "-A"], check=True, capture_output=True, text=True, cwd=self.output_dir)
+
+            # Preview what will be committed straight from git's index; no Python-side tree walk
+            numstat = subprocess.run(["git", "diff", "--cached", "--numstat"], capture_output=True, text=True, cwd=self.output_dir).stdout
+            staged = [line.split("\t", 2)[-1] for line in numstat.splitlines()]
+            print(f"   Will commit {len(staged)} files:")
+            for p in staged[:50]:
+                print(f"   - {p}")
+            if len(staged) > 50:
+                print(f"   ... and {len(staged)-50} more")
+            # Commit (may fail if nothing to commit; ignore non-zero)
+            subprocess.run(["git", "commit", "-m", "Deploy commit"], capture_output=True, text=True, cwd=self.output_dir)
+
+            print("   ✅ Local git repo ready")
+            plan.complete_todo(2)
+        except subprocess.CalledProcessError as e:
+            print(f"   ⚠️  Git init/stage/commit issue: {e}")
+            plan.complete_todo(2)
+
+    def _create_github_repo(self, plan: WorkPlan):
+        """Deploy step 3: create the GitHub repository, treating 'already exists' as success"""
+        try:
+            data = {
+                "name": self.config.github_repo,
+                "description": self.requirements.get("description", "Generated web app"),
+                "private": False,
+                "auto_init": False
+            }
+            url = "https://api.github.com/user/repos"
+            key = self._gh_cache_key("POST", url, {"name": self.config.github_repo})
+            if self._gh_cache.get(key) == "exists":
+                print("   ✅ GitHub repository ready (cached)")
+                plan.complete_todo(3)
+                return
+            response = _retry(lambda: self._http.post(url, json=data, timeout=30))
+            if response.status_code in [201, 422]:  # 422 already exists
+                self._gh_cache.set(key, "exists", expire=3600)
+                print("   ✅ GitHub repository ready")
+                plan.complete_todo(3)
+            else:
+                print(f"   ⚠️  GitHub API error: {response.status_code} - {response.text}")
+        except Exception as e:
+            print(f"   ⚠️  Error verifying/creating repo: {e}")
+
     def run_deploy_stage(self) -> bool:
         """Stage 5: Deploy to GitHub Pages"""
         print(f"\n{'='*80}")
@@ -815,8 +1716,7 @@ Format as markdown."""
 
         # 1) Flatten app to root (ensure index.html exists in root)
         print("\n📁 Ensuring app files are in repo root...")
-        root_index = self.output_dir / "index.html"
-        if not root_index.exists():
+        if not os.path.lexists(os.path.join(self.output_dir, "index.html")):
             best_dir = self._choose_best_app_dir()
             if best_dir is None:
                 print("❌ No index.html found anywhere. Aborting deployment to avoid pushing README-only.")
@@ -824,14 +1724,10 @@ Format as markdown."""
 
             print(f"   Found index.html in: {best_dir}")
             print(f"   Copying contents to repo root...")
-            for item in best_dir.rglob("*"):
-                if item.is_file():
-                    rel = item.relative_to(best_dir)
-                    dest = self.output_dir / rel
-                    dest.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(item, dest)
+            self._fast_copytree(best_dir, self.output_dir)
             if best_dir != self.output_dir:
                 shutil.rmtree(best_dir, ignore_errors=True)
+            self._file_inventory = None
 
         # Confirm index.html exists now
         if not (self.output_dir / "index.html").exists():
@@ -840,121 +1736,116 @@ Format as markdown."""
 
         # Add .nojekyll to avoid Jekyll processing issues
         (self.output_dir / ".nojekyll").write_text("", encoding="utf-8")
+        self._file_inventory = None
 
         plan.complete_todo(1)
 
-        # 2) Initialize Git repository
-        print("\n🧩 Initializing Git repository...")
-        os.chdir(self.output_dir)
-        try:
-            subprocess.run(["git", "init"], check=True, capture_output=True, text=True)
+        # 2) Initialize Git repository and 3) create / verify the GitHub repo. The two are
+        # independent, so the local git work overlaps the API round trip.
+        print("\n🧩 Initializing Git repository and 🌐 creating/verifying GitHub repository...")
 
-            # Show a preview of files that will be committed
-            files = self._list_all_files(Path("."))
-            print(f"   Will commit {len(files)} files:")
-            for p in sorted(files)[:50]:
-                print(f"   - {p}")
-            if len(files) > 50:
-                print(f"   ... and {len(files)-50} more")
+        async def prepare_local_and_remote():
+            await asyncio.gather(
+                asyncio.to_thread(self._git_init_and_commit, plan),
+                asyncio.to_thread(self._create_github_repo, plan)
+            )
 
-            # Stage all changes including deletions
-            subprocess.run(["git", "add", "-A"], check=True, capture_output=True, text=True)
-            # Commit (may fail if nothing to commit; ignore non-zero)
-            subprocess.run(["git", "commit", "-m", "Deploy commit"], capture_output=True, text=True)
+        asyncio.run(prepare_local_and_remote())
 
-            print("   ✅ Local git repo ready")
-            plan.complete_todo(2)
-        except subprocess.CalledProcessError as e:
-            print(f"   ⚠️  Git init/stage/commit issue: {e}")
-            plan.complete_todo(2)
+        # 5a) Ask GitHub to enable Pages while the push is in flight. If main isn't on the
+        # remote yet (404/422), the request waits for the push and is sent once more.
+        pages_url = f"{self._repo_base}/pages"
+        pages_data = {"source": {"branch": "main", "path": "/"}}
+        push_done = threading.Event()
 
-        # 3) Create / verify GitHub repo
-        print("\n🌐 Creating/verifying GitHub repository...")
-        try:
-            headers = {
-                "Authorization": f"token {self.config.github_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-            data = {
-                "name": self.config.github_repo,
-                "description": self.requirements.get("description", "Generated web app"),
-                "private": False,
-                "auto_init": False
-            }
-            response = requests.post("https://api.github.com/user/repos", headers=headers, json=data)
-            if response.status_code in [201, 422]:  # 422 already exists
-                print("   ✅ GitHub repository ready")
-                plan.complete_todo(3)
-            else:
-                print(f"   ⚠️  GitHub API error: {response.status_code} - {response.text}")
-        except Exception as e:
-            print(f"   ⚠️  Error verifying/creating repo: {e}")
+        def enable_pages() -> requests.Response:
+            response = _retry(lambda: self._http.post(pages_url, json=pages_data, timeout=30))
+            if response.status_code in (404, 422):
+                push_done.wait()
+                response = _retry(lambda: self._http.post(pages_url, json=pages_data, timeout=30))
+            return response
+
+        pages_pool = ThreadPoolExecutor(max_workers=1)
+        pages_future = pages_pool.submit(enable_pages)
 
         # 4) Push safely (no --force)
         print("\n⬆️  Pushing to GitHub (safe mode)...")
         try:
-            remote_url = f"https://{self.config.github_token}@github.com/{self.config.github_username}/{self.config.github_repo}.git"
-            remotes = subprocess.run(["git", "remote"], capture_output=True, text=True)
+            remote_url = self._remote_url
+            remotes = subprocess.run(["git", "remote"], capture_output=True, text=True, cwd=self.output_dir)
             if "origin" in remotes.stdout.split():
-                subprocess.run(["git", "remote", "set-url", "origin", remote_url], check=True, capture_output=True, text=True)
+                subprocess.run(["git", "remote", "set-url", "origin", remote_url], check=True, capture_output=True, text=True, cwd=self.output_dir)
             else:
-                subprocess.run(["git", "remote", "add", "origin", remote_url], check=True, capture_output=True, text=True)
-
-            subprocess.run(["git", "branch", "-M", "main"], check=True, capture_output=True, text=True)
-            push = subprocess.run(["git", "push", "-u", "origin", "main"], text=True, capture_output=True)
-            if push.returncode != 0:
-                print("   ⚠️  Non-fast-forward or other push error. Not forcing by default.")
+                subprocess.run(["git", "remote", "add", "origin", remote_url], check=True, capture_output=True, text=True, cwd=self.output_dir)
+
+            subprocess.run(["git", "branch", "-M", "main"], check=True, capture_output=True, text=True, cwd=self.output_dir)
+            push = _retry(lambda: subprocess.run(
+                # Pack on all cores with light zlib: static-site assets barely compress anyway
+                ["git", "-c", "pack.threads=0", "-c", "pack.compression=1", "-c", "pack.windowMemory=256m",
+                 "push", "--atomic", "--porcelain", "-u", "origin", "main"],
+                text=True, capture_output=True, cwd=self.output_dir, env=self._git_auth_env()
+            ))
+            refs = _parse_push_porcelain(push.stdout)
+            rejected = [summary for flag, _, summary in refs if flag == "!"]
+            if rejected:
+                # Retrying a rejected ref cannot help without --force
+                print("   ⚠️  Push rejected (not forcing by default): " + "; ".join(rejected))
+            elif push.returncode != 0:
+                print("   ⚠️  Push error.")
                 print("   Details:", push.stderr.strip())
             else:
-                print("   ✅ Pushed to GitHub")
+                up_to_date = refs and all(flag == "=" for flag, _, _ in refs)
+                print("   ✅ Remote already up to date" if up_to_date else "   ✅ Pushed to GitHub")
                 plan.complete_todo(4)
         except subprocess.CalledProcessError as e:
             print(f"   ⚠️  Push failed: {e}")
+        finally:
+            push_done.set()
 
         # 5) Enable GitHub Pages and wait for site to go live
         print("\n🟢 Enabling GitHub Pages and waiting for deployment...")
         site_url = None
         try:
-            headers = {
-                "Authorization": f"token {self.config.github_token}",
-                "Accept": "application/vnd.github.v3+json"
-            }
-            data = {"source": {"branch": "main", "path": "/"}}
-            response = requests.post(
-                f"https://api.github.com/repos/{self.config.github_username}/{self.config.github_repo}/pages",
-                headers=headers,
-                json=data
-            )
+            response = pages_future.result()
+            pages_pool.shutdown()
             if response.status_code in [201, 409]:  # 409 already enabled
-                site_url = f"https://{self.config.github_username}.github.io/{self.config.github_repo}"
+                site_url = self._site_url
                 print(f"   ✅ GitHub Pages configuration accepted")
                 print(f"   ⏳ Waiting for deployment to complete...")
 
-                max_wait, interval, elapsed = 180, 10, 0
+                # Exponential backoff with jitter; the delay resets whenever the build status changes
+                max_wait, base_delay, max_delay, jitter = 180, 2, 20, 0.5
+                started = time.monotonic()
+                attempt = 0
                 last_status = None
-                while elapsed < max_wait:
-                    time.sleep(interval)
-                    elapsed += interval
+                etag, is_live = None, False
+                while time.monotonic() - started < max_wait:
+                    delay = min(max_delay, base_delay * 2 ** attempt) * (1 + random.uniform(0, jitter))
+                    time.sleep(min(delay, max(0.0, max_wait - (time.monotonic() - started))))
+                    elapsed = int(time.monotonic() - started)
 
-                    status = self._get_pages_build_status(self.config.github_username, self.config.github_repo, self.config.github_token)
+                    status = self._get_pages_build_status()
                     if status != last_status:
                         print(f"   ⏳ Pages build status: {status or 'unknown'} ({elapsed}s)")
                         last_status = status
+                        attempt = 0
+                    else:
+                        attempt += 1
 
                     if status == "errored":
                         print("   ❌ GitHub Pages build errored. Check repository Settings → Pages → Build logs.")
                         break
 
-                    # Confirm via HEAD or GET
-                    is_live = False
+                    # Confirm with one conditional HEAD; 304 means unchanged. The site probe uses the
+                    # unauthenticated AI session so the GitHub token is never sent to github.io
                     try:
-                        head_resp = requests.head(site_url, timeout=10, allow_redirects=True)
+                        probe_headers = {"If-None-Match": etag} if etag else {}
+                        head_resp = self.ai.session.head(site_url, headers=probe_headers, timeout=10, allow_redirects=True)
                         if head_resp.status_code == 200:
                             is_live = True
-                        else:
-                            get_resp = requests.get(site_url, timeout=10, allow_redirects=True)
-                            if get_resp.status_code == 200:
-                                is_live = True
+                            etag = head_resp.headers.get("ETag", etag)
+                        elif head_resp.status_code != 304:
+                            is_live = False
                     except Exception:
                         pass
 
@@ -970,6 +1861,7 @@ Format as markdown."""
         except Exception as e:
             print(f"   ⚠️  Error enabling pages: {e}")
 
+        plan.flush()
         self.deployed_url = site_url
         return plan.is_complete()
 
@@ -1011,7 +1903,7 @@ Format as markdown."""
                 print(f"   (Your app is now accessible on the web!)")
             elif self.config.github_repo:
                 print(f"\n⚠️  Deployment configured but URL not confirmed")
-                print(f"   Check: https://{self.config.github_username}.github.io/{self.config.github_repo}")
+                print(f"   Check: {self._site_url}")
 
             print(f"\n{'='*80}\n")
 
@@ -1025,10 +1917,9 @@ def load_config() -> Config:
     """Load configuration from environment and config file"""
     config_file = Path.home() / ".webappgen" / "config.json"
 
-    if config_file.exists():
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config_data = json.load(f)
-    else:
+    try:
+        config_data = _load_json_bytes(config_file.read_bytes())
+    except FileNotFoundError:
         config_data = {}
 
     # Determine provider default (env overrides file)
@@ -1050,7 +1941,12 @@ def load_config() -> Config:
         github_username=os.getenv("GITHUB_USERNAME", config_data.get("github_username")),
         github_token=os.getenv("GITHUB_TOKEN", config_data.get("github_token")),
         github_repo=os.getenv("GITHUB_REPO", config_data.get("github_repo")),
-        output_dir=os.getenv("OUTPUT_DIR", config_data.get("output_dir", "./generated_webapp"))
+        output_dir=os.getenv("OUTPUT_DIR", config_data.get("output_dir", "./generated_webapp")),
+        batch_api=bool(config_data.get("batch_api", False)),
+        max_concurrency=int(config_data.get("max_concurrency", 8)),
+        copy_concurrency=int(config_data.get("copy_concurrency", min(8, (os.cpu_count() or 2) * 2))),
+        max_history_turns=int(config_data.get("max_history_turns", 6)),
+        response_cache=bool(config_data.get("response_cache", True))
     )
 
 
@@ -1059,8 +1955,7 @@ def save_config(config: Config):
     config_dir = Path.home() / ".webappgen"
     config_dir.mkdir(exist_ok=True)
     config_file = config_dir / "config.json"
-    with open(config_file, 'w', encoding='utf-8') as f:
-        json.dump(asdict(config), f, indent=2)
+    config_file.write_bytes(_dump_json_bytes(asdict(config)))
     print(f"✅ Configuration saved to {config_file}")
 
 
@@ -1078,6 +1973,9 @@ def main():
     parser.add_argument("--github-token", help="GitHub personal access token")
     parser.add_argument("--github-repo", help="GitHub repository name")
     parser.add_argument("--output", help="Output directory (default: ./generated_webapp)")
+    parser.add_argument("--copy-concurrency", type=int, help="Threads used to copy files when flattening for deploy")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the local AI response cache")
+    parser.add_argument("--batch-api", action="store_true", help="Use the Anthropic Message Batches API for build tasks (cheaper, slower)")
 
     args = parser.parse_args()
 
@@ -1175,6 +2073,12 @@ def main():
         config.github_repo = args.github_repo
     if args.output:
         config.output_dir = args.output
+    if args.batch_api:
+        config.batch_api = True
+    if args.no_cache:
+        config.response_cache = False
+    if args.copy_concurrency:
+        config.copy_concurrency = max(1, args.copy_concurrency)
 
     # Validate required config
     if not config.api_key:
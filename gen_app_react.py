@@ -25,17 +25,53 @@ Save as webapp_gen.py and run:
 import os
 import sys
 import json
+import asyncio
+import functools
+import hashlib
+import heapq
+import importlib
+import importlib.util
+import threading
 import subprocess
 import time
 import re
 import shutil
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+try:
+    import httpx  # optional: pooled async HTTP for concurrent LLM calls
+except ImportError:
+    httpx = None
+
+try:
+    import pygit2  # optional: in-process git init/add/commit/remote for the deploy stage
+except ImportError:
+    pygit2 = None
+
+try:
+    import orjson  # optional: faster JSON for plans, package.json and API responses
+except ImportError:
+    orjson = None
+
+def _dump_json_bytes(obj) -> bytes:
+    """Serialize obj as indented UTF-8 JSON, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+
+def _load_json_bytes(data):
+    """Parse JSON from bytes or str (LLM output slices are passed as str), via orjson when available"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
 # --------------------
 # Core dataclasses
 # --------------------
@@ -60,6 +96,17 @@ class Config:
     stack: str = "basic"  # "basic" or "react"
     e2e: bool = False
     e2e_deployed: bool = False
+    max_concurrency: int = 8  # in-flight LLM requests for fan-out calls
+    build_concurrency: int = 4  # build todos worked on at once (1 = sequential, shared history)
+    ai_parallel_probes: bool = False  # test stage: request the two largest budgets at once (both are billed)
+    rpm_limit: int = 500  # provider requests-per-minute budget (0 disables pacing)
+    batch_api: bool = False  # provider Batch APIs for non-interactive prompts: ~50% cheaper, slower
+    batch_poll_interval: float = 10.0
+    cache: bool = True  # reuse identical LLM responses across runs (~/.webappgen/llm_cache.sqlite3)
+    prompt_caching: bool = True  # Anthropic cache_control on the system prompt and history prefix
+    history_token_budget: int = 8000  # older turns are rolled into a summary beyond this (estimated)
+    stream: bool = True  # read completions as server-sent events instead of one JSON body
+    request_timeout: Tuple[float, float] = (10.0, 120.0)  # (connect, read) seconds for LLM calls
 
     @property
     def api_base_url(self) -> str:
@@ -68,6 +115,40 @@ class Config:
         else:
             return "https://api.anthropic.com/v1/messages"
 
+# --------------------
+# LLM response cache
+# --------------------
+
+class LLMCache:
+    """
+    Content-addressed response store: sha256 of the request -> response text, in SQLite (WAL).
+    Only the newest max_entries are kept.
+    """
+
+    def __init__(self, path: Path, max_entries: int = 2000):
+        import sqlite3  # deferred: only loaded when the cache is enabled
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL)")
+        self._db.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                             (key, value, time.time()))
+            self._db.execute("DELETE FROM responses WHERE key NOT IN "
+                             "(SELECT key FROM responses ORDER BY created DESC LIMIT ?)", (self.max_entries,))
+            self._db.commit()
+
 # --------------------
 # AI Client
 # --------------------
@@ -76,38 +157,75 @@ class AIClient:
     def __init__(self, config: Config):
         self.config = config
         self.conversation_history: List[Dict[str, str]] = []
+        self._summary: Optional[str] = None
+        # One pooled keep-alive session for every LLM call (and the live smoke-test),
+        # so sequential pipeline turns skip the per-call TCP + TLS handshake.
+        self.session = requests.Session()
+        # Transient 429/5xx are retried with exponential backoff, honouring Retry-After
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=4, pool_maxsize=8,
+            max_retries=Retry(total=5, backoff_factor=1.5, status_forcelist=[429, 500, 502, 503, 504],
+                              respect_retry_after_header=True,
+                              allowed_methods=frozenset({"GET", "HEAD", "POST"}))
+        ))
+        # Token bucket for fan-out calls: the monotonic time the next request may start
+        self._next_request_at = 0.0
+        # Kept out of output_dir, which is committed and pushed wholesale on deploy
+        self.cache: Optional[LLMCache] = None
+        if config.cache:
+            try:
+                self.cache = LLMCache(Path.home() / ".webappgen" / "llm_cache.sqlite3")
+            except Exception as e:
+                print(f"⚠️  LLM cache disabled: {e}")
 
-    def _call_anthropic(self, prompt: str, system_prompt: str = None) -> str:
+    @property
+    def headers(self) -> Dict[str, str]:
+        # Sent per request rather than on session.headers so the API key never reaches the
+        # generated site during smoke-tests; read from config since preflight may change it.
+        if self.config.provider.lower() == "openai":
+            return {
+                "Authorization": f"Bearer {self.config.api_key}",
+                "Content-Type": "application/json"
+            }
         headers = {
             "x-api-key": self.config.api_key,
             "anthropic-version": "2023-06-01",
             "content-type": "application/json"
         }
-        messages = self.conversation_history + [{"role": "user", "content": prompt}]
-        payload = {
+        if self.config.prompt_caching:
+            headers["anthropic-beta"] = "prompt-caching-2024-07-31"
+        return headers
+
+    def _anthropic_payload(self, prompt: str, system_prompt: Optional[str],
+                           history: List[Dict[str, str]]) -> Dict[str, object]:
+        messages: List[Dict[str, object]] = list(history)
+        if self.config.prompt_caching and messages:
+            # Anthropic only caches prefixes of >= 1024 tokens; estimate at ~4 chars per token.
+            # The breakpoint goes on the newest history turn so the whole stable prefix is reused.
+            prefix_chars = len(system_prompt or "") + sum(len(m["content"]) for m in messages)
+            if prefix_chars // 4 >= 1024:
+                last = messages[-1]
+                messages[-1] = {"role": last["role"], "content": [
+                    {"type": "text", "text": last["content"], "cache_control": {"type": "ephemeral"}}
+                ]}
+        payload: Dict[str, object] = {
             "model": self.config.model_id,
             "max_tokens": 4096,
-            "messages": messages
+            "messages": messages + [{"role": "user", "content": prompt}]
         }
         if system_prompt:
-            payload["system"] = system_prompt
-        r = requests.post(self.config.api_base_url, headers=headers, json=payload, timeout=120)
-        r.raise_for_status()
-        data = r.json()
-        try:
-            return data["content"][0]["text"]
-        except Exception:
-            return json.dumps(data)
+            if self.config.prompt_caching:
+                payload["system"] = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+            else:
+                payload["system"] = system_prompt
+        return payload
 
-    def _call_openai(self, prompt: str, system_prompt: str = None) -> str:
-        headers = {
-            "Authorization": f"Bearer {self.config.api_key}",
-            "Content-Type": "application/json"
-        }
+    def _openai_payload(self, prompt: str, system_prompt: Optional[str],
+                        history: List[Dict[str, str]]) -> Dict[str, object]:
         messages: List[Dict[str, str]] = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
-        messages.extend(self.conversation_history)
+        messages.extend(history)
         messages.append({"role": "user", "content": prompt})
         payload: Dict[str, object] = {
             "model": self.config.model_id,
@@ -119,34 +237,321 @@ class AIClient:
             payload["max_completion_tokens"] = 4096
         else:
             payload["max_tokens"] = 4096
-        r = requests.post(self.config.api_base_url, headers=headers, json=payload, timeout=120)
-        r.raise_for_status()
-        data = r.json()
+        return payload
+
+    def _payload(self, prompt: str, system_prompt: Optional[str], history: List[Dict[str, str]]) -> Dict[str, object]:
+        if self.config.provider.lower() == "openai":
+            return self._openai_payload(prompt, system_prompt, history)
+        return self._anthropic_payload(prompt, system_prompt, history)
+
+    def _parse(self, data: Dict) -> str:
         try:
-            return data["choices"][0]["message"]["content"]
+            if self.config.provider.lower() == "openai":
+                return data["choices"][0]["message"]["content"]
+            return data["content"][0]["text"]
         except Exception:
             return json.dumps(data)
 
+    def _post(self, payload: Dict[str, object]) -> Dict:
+        r = self.session.post(self.config.api_base_url, headers=self.headers, json=payload,
+                              timeout=self.config.request_timeout)
+        r.raise_for_status()
+        return _load_json_bytes(r.content)
+
+    def _post_stream(self, payload: Dict[str, object]) -> str:
+        """POST with stream=true and concatenate the text deltas from the provider's SSE events"""
+        openai = self.config.provider.lower() == "openai"
+        parts: List[str] = []
+        with self.session.post(self.config.api_base_url, headers=self.headers, json=dict(payload, stream=True),
+                               timeout=self.config.request_timeout, stream=True) as r:
+            r.raise_for_status()
+            for raw in r.iter_lines():
+                if not raw.startswith(b"data:"):
+                    continue  # blank separators and "event:" lines; the data payload carries the type
+                data = raw[5:].strip()
+                if data == b"[DONE]":
+                    break
+                event = _load_json_bytes(data)
+                if openai:
+                    for choice in event.get("choices") or []:
+                        text = (choice.get("delta") or {}).get("content")
+                        if text:
+                            parts.append(text)
+                elif event.get("type") == "content_block_delta":
+                    text = (event.get("delta") or {}).get("text")
+                    if text:
+                        parts.append(text)
+                elif event.get("type") == "error":
+                    raise RuntimeError(f"stream error: {event.get('error')}")
+        return "".join(parts)
+
+    def _call_anthropic(self, prompt: str, system_prompt: str = None) -> str:
+        payload = self._anthropic_payload(prompt, system_prompt, self.conversation_history)
+        if self.config.stream:
+            return self._post_stream(payload)
+        return self._parse(self._post(payload))
+
+    def _call_openai(self, prompt: str, system_prompt: str = None) -> str:
+        payload = self._openai_payload(prompt, system_prompt, self.conversation_history)
+        if self.config.stream:
+            return self._post_stream(payload)
+        return self._parse(self._post(payload))
+
+    def _cache_key(self, prompt: str, system_prompt: Optional[str], history: List[Dict[str, str]]) -> str:
+        messages = history + [{"role": "user", "content": prompt}]
+        blob = json.dumps({"p": self.config.provider.lower(), "m": self.config.model_id,
+                           "s": system_prompt, "h": messages}, sort_keys=True)
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    # Raw turns (user+assistant pairs) always kept verbatim when the history is compacted
+    KEEP_RECENT_TURNS = 4
+
+    @staticmethod
+    def _estimate_tokens(msg: Dict[str, str]) -> int:
+        return len(msg["content"]) // 4
+
+    def _compact_history(self):
+        """
+        Keep prefill bounded: once the history exceeds config.history_token_budget, roll all
+        but the last KEEP_RECENT_TURNS turns into a model-written summary that leads the history.
+        """
+        history = self.conversation_history
+        keep = 2 * self.KEEP_RECENT_TURNS
+        if len(history) <= keep or sum(map(self._estimate_tokens, history)) <= self.config.history_token_budget:
+            return
+        older, recent = history[:-keep], history[-keep:]
+        transcript = "\n\n".join(f"{m['role'].upper()}: {m['content']}" for m in older)
+        # The summary request itself must fit in the budget; the newest context matters most
+        transcript = transcript[-self.config.history_token_budget * 4:]
+        prompt = ("Summarize the prior conversation below, preserving decisions, file plans, and failing tests. "
+                  "Be concise; this summary replaces the transcript.\n\n" + transcript)
+        try:
+            key = self._cache_key(prompt, None, []) if self.cache else None
+            summary = self.cache.get(key) if key else None
+            if summary is None:
+                summary = self._parse(self._post(self._payload(prompt, None, [])))
+                if key and summary:
+                    self.cache.set(key, summary)
+        except Exception as e:
+            print(f"   ⚠️  History summarization failed ({e}); dropping older turns")
+            summary = self._summary
+        self._summary = summary
+        lead = []
+        if summary:
+            lead = [{"role": "user", "content": f"Summary of our earlier conversation:\n{summary}"},
+                    {"role": "assistant", "content": "Understood. Continuing from that summary."}]
+        self.conversation_history = lead + recent
+        print(f"   🗜️  Compacted conversation history ({len(older)} older messages summarized)")
+
     def call(self, prompt: str, system_prompt: str = None) -> str:
         try:
-            if self.config.provider.lower() == "openai":
-                text = self._call_openai(prompt, system_prompt)
+            self._compact_history()
+            key = self._cache_key(prompt, system_prompt, self.conversation_history) if self.cache else None
+            text = self.cache.get(key) if key else None
+            if text is None:
+                if self.config.provider.lower() == "openai":
+                    text = self._call_openai(prompt, system_prompt)
+                else:
+                    text = self._call_anthropic(prompt, system_prompt)
+                if key and text:
+                    self.cache.set(key, text)
             else:
-                text = self._call_anthropic(prompt, system_prompt)
+                print("   ♻️  Reused cached AI response")
             self.conversation_history.append({"role": "user", "content": prompt})
             self.conversation_history.append({"role": "assistant", "content": text})
             return text
         except Exception as e:
-            print(f"❌ API Error: {e}")
-            if hasattr(e, "response") and e.response is not None:
-                try:
-                    print(f"   Response: {e.response.text}")
-                except Exception:
-                    pass
+            self._report_error(e)
+            return ""
+
+    def call_with_history(self, prompt: str, system_prompt: Optional[str], history: List[Dict[str, str]]) -> str:
+        """
+        call() against a caller-owned history list, which the turn is appended to; conversation_history
+        is left alone, so independent conversations can run from worker threads.
+        """
+        try:
+            key = self._cache_key(prompt, system_prompt, history) if self.cache else None
+            text = self.cache.get(key) if key else None
+            if text is None:
+                payload = self._payload(prompt, system_prompt, history)
+                text = self._post_stream(payload) if self.config.stream else self._parse(self._post(payload))
+                if key and text:
+                    self.cache.set(key, text)
+            history.append({"role": "user", "content": prompt})
+            history.append({"role": "assistant", "content": text})
+            return text
+        except Exception as e:
+            self._report_error(e)
             return ""
 
+    def _report_error(self, e: Exception):
+        print(f"❌ API Error: {e}")
+        if hasattr(e, "response") and e.response is not None:
+            try:
+                print(f"   Response: {e.response.text}")
+            except Exception:
+                pass
+
+    async def _acquire_token(self):
+        """Space request starts 60/rpm_limit seconds apart so bursts do not trip 429s"""
+        if self.config.rpm_limit <= 0:
+            return
+        now = time.monotonic()
+        start = max(now, self._next_request_at)
+        self._next_request_at = start + 60.0 / self.config.rpm_limit
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def acall(self, prompt: str, system_prompt: str = None, client=None,
+                    history: Optional[List[Dict[str, str]]] = None) -> str:
+        """
+        Async variant of call() that does not touch the conversation history. Posts through
+        the given httpx.AsyncClient, or runs the pooled requests session in a worker thread.
+        """
+        history = list(self.conversation_history if history is None else history)
+        key = self._cache_key(prompt, system_prompt, history) if self.cache else None
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return cached
+        payload = self._payload(prompt, system_prompt, history)
+        await self._acquire_token()
+        if client is None:
+            data = await asyncio.to_thread(self._post, payload)
+        else:
+            r = await client.post(self.config.api_base_url, headers=self.headers, json=payload)
+            r.raise_for_status()
+            data = r.json()
+        text = self._parse(data)
+        if key and text:
+            self.cache.set(key, text)
+        return text
+
+    async def acall_many(self, prompts: List[str], system_prompt: str = None,
+                         on_progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        Fan prompts out against one history snapshot, at most config.max_concurrency in flight.
+        on_progress(done, total) is called as each request finishes; results keep prompt order.
+        """
+        history = list(self.conversation_history)
+        # Created per run: asyncio primitives bind to the loop that first waits on them
+        semaphore = asyncio.Semaphore(max(1, self.config.max_concurrency))
+        done = 0
+        client = None
+        if httpx is not None:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.config.request_timeout[1], connect=self.config.request_timeout[0]),
+                http2=importlib.util.find_spec("h2") is not None,
+                limits=httpx.Limits(max_connections=16)
+            )
+
+        async def worker(prompt: str) -> str:
+            nonlocal done
+            async with semaphore:
+                try:
+                    text = await self.acall(prompt, system_prompt, client=client, history=history)
+                except Exception as e:
+                    self._report_error(e)
+                    text = ""
+            done += 1
+            if on_progress is not None:
+                on_progress(done, len(prompts))
+            return text
+
+        try:
+            return list(await asyncio.gather(*(worker(p) for p in prompts)))
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    def _call_anthropic_batch(self, prompts: List[str], system_prompt: str = None) -> List[str]:
+        """Submit prompts as one Anthropic Message Batch and wait for the results"""
+        batches_url = f"{self.config.api_base_url}/batches"
+        body = {"requests": [
+            {"custom_id": f"req-{i}", "params": self._anthropic_payload(p, system_prompt, self.conversation_history)}
+            for i, p in enumerate(prompts)
+        ]}
+        r = self.session.post(batches_url, headers=self.headers, json=body, timeout=120)
+        r.raise_for_status()
+        batch = r.json()
+        while batch.get("processing_status") != "ended":
+            time.sleep(self.config.batch_poll_interval)
+            r = self.session.get(f"{batches_url}/{batch['id']}", headers=self.headers, timeout=30)
+            r.raise_for_status()
+            batch = r.json()
+        r = self.session.get(batch["results_url"], headers=self.headers, timeout=120)
+        r.raise_for_status()
+        results = [""] * len(prompts)
+        for line in r.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            result = entry.get("result") or {}
+            if result.get("type") == "succeeded":
+                results[int(entry["custom_id"].split("-", 1)[1])] = self._parse(result["message"])
+            else:
+                print(f"❌ Batch request {entry.get('custom_id')} {result.get('type', 'failed')}")
+        return results
+
+    def _call_openai_batch(self, prompts: List[str], system_prompt: str = None) -> List[str]:
+        """Upload prompts as a JSONL file, run it through the OpenAI Batch API and download the output"""
+        api = self.config.api_base_url.rsplit("/chat/completions", 1)[0]
+        auth = {"Authorization": f"Bearer {self.config.api_key}"}
+        jsonl = "\n".join(json.dumps({
+            "custom_id": f"req-{i}", "method": "POST", "url": "/v1/chat/completions",
+            "body": self._openai_payload(p, system_prompt, self.conversation_history)
+        }) for i, p in enumerate(prompts))
+        r = self.session.post(f"{api}/files", headers=auth, data={"purpose": "batch"},
+                              files={"file": ("batch.jsonl", jsonl.encode("utf-8"))}, timeout=120)
+        r.raise_for_status()
+        r = self.session.post(f"{api}/batches", headers=self.headers, timeout=60, json={
+            "input_file_id": r.json()["id"], "endpoint": "/v1/chat/completions", "completion_window": "24h"
+        })
+        r.raise_for_status()
+        batch = r.json()
+        while batch.get("status") not in ("completed", "failed", "expired", "cancelled"):
+            time.sleep(self.config.batch_poll_interval)
+            r = self.session.get(f"{api}/batches/{batch['id']}", headers=self.headers, timeout=30)
+            r.raise_for_status()
+            batch = r.json()
+        results = [""] * len(prompts)
+        if not batch.get("output_file_id"):
+            print(f"❌ Batch {batch['id']} {batch.get('status')} without output")
+            return results
+        r = self.session.get(f"{api}/files/{batch['output_file_id']}/content", headers=auth, timeout=120)
+        r.raise_for_status()
+        for line in r.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            body = (entry.get("response") or {}).get("body")
+            if body and not entry.get("error"):
+                results[int(entry["custom_id"].split("-", 1)[1])] = self._parse(body)
+            else:
+                print(f"❌ Batch request {entry.get('custom_id')} failed: {entry.get('error')}")
+        return results
+
+    def call_many(self, prompts: List[str], system_prompt: str = None,
+                  on_progress: Optional[Callable[[int, int], None]] = None) -> List[str]:
+        """
+        Send independent prompts that share the current history; responses come back in
+        prompt order and are not added to the history. With config.batch_api they go
+        through the provider's Batch API instead of concurrent requests.
+        """
+        if not prompts:
+            return []
+        if self.config.batch_api:
+            try:
+                if self.config.provider.lower() == "openai":
+                    return self._call_openai_batch(prompts, system_prompt)
+                return self._call_anthropic_batch(prompts, system_prompt)
+            except Exception as e:
+                self._report_error(e)
+                return [""] * len(prompts)
+        return asyncio.run(self.acall_many(prompts, system_prompt, on_progress))
+
     def reset_conversation(self):
         self.conversation_history = []
+        self._summary = None
 
 # --------------------
 # WorkPlan
@@ -156,27 +561,47 @@ class WorkPlan:
     def __init__(self, stage: Stage, output_dir: Path):
         self.stage = stage
         self.output_dir = output_dir
-        self.plan_file = output_dir / f"{stage.value}_plan.json"
+        # Absolute, so saves land in output_dir whatever the working directory is later
+        self.plan_file = output_dir.resolve() / f"{stage.value}_plan.json"
         self.todos: List[Dict] = []
+        # Completions are batched: written every autosave_every todos and on flush()
+        self.autosave_every = 10
+        self._dirty = False
+        self._unsaved = 0
+
+    def __enter__(self) -> "WorkPlan":
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
 
     def save(self):
+        # Write-then-rename so an interrupted run never leaves a truncated plan behind
         self.plan_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.plan_file, 'w', encoding='utf-8') as f:
-            json.dump(self.todos, f, indent=2)
+        tmp = self.plan_file.with_name(self.plan_file.name + ".tmp")
+        tmp.write_bytes(_dump_json_bytes(self.todos))
+        os.replace(tmp, self.plan_file)
+        self._dirty = False
+        self._unsaved = 0
+
+    def flush(self):
+        """Write the plan if todos were completed since the last save"""
+        if self._dirty:
+            self.save()
 
     def load(self) -> bool:
         if self.plan_file.exists():
-            with open(self.plan_file, 'r', encoding='utf-8') as f:
-                self.todos = json.load(f)
+            self.todos = _load_json_bytes(self.plan_file.read_bytes())
             return True
         return False
 
-    def add_todo(self, title: str, description: str, acceptance_criteria: List[str]):
+    def add_todo(self, title: str, description: str, acceptance_criteria: List[str], interactive: bool = True):
         self.todos.append({
             "id": len(self.todos) + 1,
             "title": title,
             "description": description,
             "acceptance_criteria": acceptance_criteria,
+            "interactive": interactive,
             "status": "pending",
             "completed_at": None
         })
@@ -186,8 +611,11 @@ class WorkPlan:
             if t["id"] == todo_id:
                 t["status"] = "completed"
                 t["completed_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                self._dirty = True
+                self._unsaved += 1
                 break
-        self.save()
+        if self._unsaved >= self.autosave_every:
+            self.save()
 
     def get_pending_todos(self) -> List[Dict]:
         return [t for t in self.todos if t["status"] == "pending"]
@@ -204,15 +632,346 @@ ALLOWED_EXTENSIONS = {
     ".ts", ".tsx", ".jsx", ".map", ".woff", ".woff2", ".webp"
 }
 ALLOWED_TOP_DIRS = {"", "assets", "css", "js", "images", "img", "static", "src", ".github", "public"}
+# Local asset references worth checking for existence
+ASSET_EXTENSIONS = (".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp")
+
+# _sanitize_filepath runs once per emitted file, so its patterns are compiled once here
+_SPLIT_RE = re.compile(r"\s+\(|`")
+_PREFIX_RE = re.compile(r"^(?:file:|filename:)\s*", re.IGNORECASE)
+_STRIP_RE = re.compile(r"[^A-Za-z0-9._\-/]")
+_SLASHES_RE = re.compile(r"/{2,}")
+# Root-relative src/href values for the regex rewrite fallback; protocol-relative //host URLs are left alone
+_REWRITE_RE = re.compile(r'(\s(?:src|href)\s*=\s*[\'"])/(?!/)([^\'"]+)', re.IGNORECASE)
+# Bare-module ES imports in generated sources: import x from "mod" / import "mod"
+_IMPORT_RE = re.compile(r'^\s*import\s+(?:[^"\']+from\s+)?[\'"]([^\'"]+)[\'"]', re.MULTILINE)
+
+@functools.lru_cache(maxsize=4096)
+def _sanitize_filepath_cached(raw: str, stack: str) -> Optional[str]:
+    """Map an LLM-written FILENAME to a safe relative POSIX path, or None. Memoized: retries repeat names."""
+    if not raw:
+        return None
+    s = raw.strip().strip('`"\'')
+    s = s.replace("\\", "/")
+    s = _SPLIT_RE.split(s, maxsplit=1)[0].strip()
+    s = _PREFIX_RE.sub("", s)
+    s = _STRIP_RE.sub("", s)
+    s = _SLASHES_RE.sub("/", s)
+    s = s.lstrip("/.")
+    if not s:
+        return None
+    p = Path(s)
+    if p.suffix.lower() not in ALLOWED_EXTENSIONS:
+        return None
+    parts = p.parts
+    if len(parts) > 1 and parts[0] not in ALLOWED_TOP_DIRS:
+        ext = p.suffix.lower()
+        if ext in {".css"}:
+            p = Path("css") / p.name
+        elif ext in {".js", ".ts", ".tsx", ".jsx"}:
+            p = Path("src") / p.name if stack == "react" else Path("js") / p.name
+        elif ext in {".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp"}:
+            p = Path("assets") / p.name
+        else:
+            p = Path(p.name)
+    # Return POSIX-style path
+    return str(p).replace("\\", "/")
+
+# Characters that matter when matching the outermost JSON object/array in LLM prose
+_JSON_SCAN_RES = {"{}": re.compile(r'[{}"\\]'), "[]": re.compile(r'[\[\]"\\]')}
+
+
+def _slice_outer_json(resp: str, open_c: str = "{", close_c: str = "}") -> str:
+    """
+    The first balanced open_c...close_c span in resp, skipping brackets inside string literals.
+    Unlike first-open/last-close this ignores trailing prose or a second block. "" if there is
+    no open_c; the unbalanced tail if the response was cut off.
+    """
+    start = resp.find(open_c)
+    if start < 0:
+        return ""
+    pattern = _JSON_SCAN_RES.get(open_c + close_c) or re.compile("[" + re.escape(open_c + close_c) + '"\\\\]')
+    depth, in_str, skip = 0, False, -1
+    for m in pattern.finditer(resp, start):
+        i = m.start()
+        if i == skip:
+            continue
+        c = resp[i]
+        if in_str:
+            if c == "\\":
+                skip = i + 1
+            elif c == '"':
+                in_str = False
+        elif c == '"':
+            in_str = True
+        elif c == open_c:
+            depth += 1
+        elif c == close_c:
+            depth -= 1
+            if depth == 0:
+                return resp[start:i + 1]
+    return resp[start:]
+
+# Acceptance criteria simple enough to check on disk instead of asking the LLM
+_CRITERION_EXISTS_RE = re.compile(r'^\s*[`\'"]?([\w./-]+\.\w+)[`\'"]?\s+(?:file\s+)?exists\.?\s*$', re.IGNORECASE)
+_CRITERION_CONTAINS_RE = re.compile(r'^\s*contains\s+[`\'"](.+?)[`\'"]\s+in\s+[`\'"]?([\w./-]+\.\w+)[`\'"]?\.?\s*$', re.IGNORECASE)
+
+
+def _local_verify(criterion: str, root: Path) -> Optional[bool]:
+    """
+    Check "<path> exists" and "contains '<text>' in <path>" criteria against the output tree.
+    None when the criterion is anything else (or points outside root) and needs the LLM.
+    """
+    m = _CRITERION_EXISTS_RE.match(criterion)
+    if m:
+        rel, needle = m.group(1), None
+    else:
+        m = _CRITERION_CONTAINS_RE.match(criterion)
+        if not m:
+            return None
+        needle, rel = m.groups()
+    path = (root / rel).resolve()
+    if not path.is_relative_to(root):
+        return None
+    if needle is None:
+        return path.exists()
+    try:
+        return needle in path.read_text(encoding="utf-8", errors="ignore")
+    except OSError:
+        return False
+
+# File-block formats accepted from LLM responses, fused into one scan. Alternatives in priority order:
+# f1 "FILENAME: path" header, f2 path comment on the fence line, f3 markdown heading, f4 path comment
+# on the first line; lang/c5 is the bare ```lang block used only when nothing else matched
+_FILE_EXTS = r'html|css|js|json|svg|png|jpg|jpeg|gif|ico|ts|tsx|jsx|map|woff|woff2|webp'
+_FILE_BLOCKS_RE = re.compile(
+    r'FILENAME:\s*(?P<f1>[^\n]+)\s*```[\w]*\n(?P<c1>.*?)```'
+    r'|```[\w]*\s*(?://|#|<!--)\s*(?P<f2>[^\n]+?\.(?:' + _FILE_EXTS + r'))\s*(?:-->)?\s*\n(?P<c2>.*?)```'
+    r'|#+\s*(?:File:|Filename:)?\s*`?(?P<f3>[^\n]+?\.(?:html|css|js|json|svg|ts|tsx|jsx))`?\s*\n```[\w]*\n(?P<c3>.*?)```'
+    r'|```[\w]*\s*\n(?:\/\/|#|<!--)?\s*(?P<f4>[a-zA-Z0-9_\-\/\.]+\.(?:' + _FILE_EXTS + r'))\s*(?:-->)?\s*\n(?P<c4>.*?)```'
+    r'|```(?P<lang>\w+)\n(?P<c5>.*?)```',
+    re.DOTALL
+)
+# Target path for bare code blocks by fence language
+_GENERIC_TARGETS = {"css": "css/styles.css", "javascript": "js/script.js", "js": "js/script.js",
+                    "tsx": "src/App.tsx", "typescript": "src/App.tsx"}
+
+# Signature lines kept by _summarize_code_for_llm for JS/TS sources
+_SUMMARY_IMPORT_RE = re.compile(r'^\s*import\b')
+_SUMMARY_EXPORT_RE = re.compile(r'^\s*export\b')
+_SUMMARY_FUNC_RE = re.compile(r'^\s*(?:export\s+)?(?:async\s+)?function\b')
+_SUMMARY_CONST_FUNC_RE = re.compile(r'^\s*(?:export\s+)?const\s+[A-Za-z0-9_]+\s*=\s*(?:async\s*)?\(')
+_SUMMARY_COMPONENT_RE = re.compile(r'^\s*(?:export\s+)?(?:const|function)\s+[A-Z][A-Za-z0-9_]*\s*(?:[:=]|\()')
+_SUMMARY_INTERFACE_RE = re.compile(r'^\s*interface\s+[A-Za-z0-9_]+')
+_SUMMARY_TYPE_RE = re.compile(r'^\s*type\s+[A-Za-z0-9_]+')
+
+# --------------------
+# Scaffold templates: encoded once at import, written with write_bytes
+# --------------------
+
+_TAILWIND_CONFIG_BYTES = (
+    'module.exports = {\n'
+    '  content: ["./index.html", "./src/**/*.{ts,tsx,jsx,js}"],\n'
+    '  theme: { extend: {} },\n'
+    '  plugins: [require("tailwindcss-animate")],\n'
+    '};\n'
+).encode("utf-8")
+_POSTCSS_CONFIG_BYTES = b'module.exports = { plugins: { tailwindcss: {}, autoprefixer: {} } };\n'
+_REACT_INDEX_HTML_BYTES = (
+    '<!doctype html>\n<html lang="en">\n  <head>\n'
+    '    <meta charset="UTF-8" />\n'
+    '    <meta name="viewport" content="width=device-width, initial-scale=1.0" />\n'
+    '    <title>App</title>\n'
+    '    <link rel="preconnect" href="https://fonts.googleapis.com">\n'
+    '    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
+    '    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">\n'
+    '  </head>\n  <body>\n    <div id="root"></div>\n    <script type="module" src="/src/main.tsx"></script>\n  </body>\n</html>\n'
+).encode("utf-8")
+_INDEX_CSS_BYTES = b"@tailwind base;\n@tailwind components;\n@tailwind utilities;\n"
+_MAIN_TSX_BYTES = (
+    'import React from "react";\nimport ReactDOM from "react-dom/client";\nimport "./index.css";\nimport App from "./App";\n\nReactDOM.createRoot(document.getElementById("root")!).render(\n  <React.StrictMode>\n    <App />\n  </React.StrictMode>\n);\n'
+).encode("utf-8")
+_APP_TSX_BYTES = (
+    'import React from "react";\nimport { LucideCheckSquare } from "lucide-react";\nexport default function App(){\n  return (\n    <div className="min-h-screen bg-white text-slate-900">\n      <div className="mx-auto max-w-3xl p-6">\n        <header className="py-8">\n          <h1 className="text-3xl font-bold flex items-center gap-2">\n            <LucideCheckSquare className="w-7 h-7" />\n            App Starter\n          </h1>\n          <p className="mt-2 text-slate-600">React + Tailwind scaffold. The generator/LLM will expand this.</p>\n        </header>\n        <main className="space-y-6">\n          <section className="p-6 rounded-lg border bg-slate-50">\n            <h2 className="text-xl font-semibold">Getting Started</h2>\n            <p className="mt-2 text-slate-600">Add components and logic. This content ensures the site is never blank.</p>\n          </section>\n        </main>\n        <footer className="mt-12 text-sm text-slate-500">Generated by WebAppGenerator</footer>\n      </div>\n    </div>\n  );\n}\n'
+).encode("utf-8")
+_TSCONFIG_BYTES = '{\n  "compilerOptions": {\n    "target": "ES2020", "useDefineForClassFields": true, "lib": ["ES2020","DOM","DOM.Iterable"],\n    "module": "ESNext", "skipLibCheck": true, "jsx": "react-jsx", "moduleResolution": "Bundler",\n    "resolveJsonModule": true, "isolatedModules": true, "noEmit": true, "esModuleInterop": true,\n    "strict": true, "noUncheckedIndexedAccess": true, "forceConsistentCasingInFileNames": true\n  },\n  "include": ["src"]\n}\n'.encode("utf-8")
+_PACKAGE_JSON = {
+    "name": "webapp",
+    "private": True,
+    "version": "0.0.0",
+    "type": "module",
+    "scripts": {"dev": "vite", "build": "vite build", "preview": "vite preview"},
+    "dependencies": {
+        "react": "^18.3.1",
+        "react-dom": "^18.3.1",
+        "lucide-react": "^0.453.0",
+        "@dnd-kit/core": "^6.1.0",
+        "@dnd-kit/sortable": "^7.0.2",
+        "@dnd-kit/modifiers": "6.0.2",
+        "@nivo/core": "^0.86.0",
+        "@nivo/line": "^0.86.0",
+        "@nivo/bar": "^0.86.0",
+        "@tanstack/react-table": "^8.20.5",
+        "react-hook-form": "^7.52.1",
+        "@hookform/resolvers": "^3.9.0",
+        "zod": "^3.23.8",
+        "date-fns": "^3.6.0",
+        "react-day-picker": "^9.0.7"
+    },
+    "devDependencies": {
+        "@types/react": "^18.3.3",
+        "@types/react-dom": "^18.3.0",
+        "@vitejs/plugin-react": "^4.3.1",
+        "autoprefixer": "^10.4.20",
+        "postcss": "^8.4.45",
+        "tailwindcss": "^3.4.10",
+        "tailwindcss-animate": "^1.0.7",
+        "typescript": "^5.6.2",
+        "vite": "^5.4.8"
+    }
+}
+_PACKAGE_JSON_BYTES = _dump_json_bytes(_PACKAGE_JSON)
+_PAGES_YML_BYTES = (
+    "name: Deploy to GitHub Pages\n"
+    "on:\n"
+    "  push:\n"
+    "    branches: [ \"main\" ]\n"
+    "permissions:\n"
+    "  contents: read\n"
+    "  pages: write\n"
+    "  id-token: write\n"
+    "concurrency:\n"
+    "  group: pages\n"
+    "  cancel-in-progress: true\n"
+    "jobs:\n"
+    "  build:\n"
+    "    runs-on: ubuntu-latest\n"
+    "    steps:\n"
+    "      - uses: actions/checkout@v4\n"
+    "      - name: Setup Node\n"
+    "        uses: actions/setup-node@v4\n"
+    "        with:\n"
+    "          node-version: 20\n"
+    "      - name: Install dependencies\n"
+    "        run: |\n"
+    "          if [ -f package-lock.json ]; then\n"
+    "            npm ci\n"
+    "          else\n"
+    "            npm install\n"
+    "          fi\n"
+    "      - name: Build\n"
+    "        run: npm run build\n"
+    "      - name: Upload Pages artifact\n"
+    "        uses: actions/upload-pages-artifact@v3\n"
+    "        with:\n"
+    "          path: ./dist\n"
+    "  deploy:\n"
+    "    needs: build\n"
+    "    runs-on: ubuntu-latest\n"
+    "    environment:\n"
+    "      name: github-pages\n"
+    "      url: ${{ steps.deployment.outputs.page_url }}\n"
+    "    steps:\n"
+    "      - id: deployment\n"
+    "        uses: actions/deploy-pages@v4\n"
+).encode("utf-8")
+_SKELETON_HTML_BYTES = """<!doctype html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>Landing - Generated App</title>
+  <link rel="stylesheet" href="css/styles.css">
+  <style>
+    body{font-family:Inter,system-ui,-apple-system,Segoe UI,Roboto,Ubuntu;margin:0}
+    .container{max-width:1000px;margin:0 auto;padding:24px}
+    .hero{padding:64px 24px;background:#f8fafc}
+    .btn{background:#38bdf8;color:#0f172a;padding:12px 18px;border-radius:8px;text-decoration:none;font-weight:600}
+    .grid{display:grid;gap:16px;grid-template-columns:repeat(auto-fit,minmax(220px,1fr))}
+    .card{border:1px solid #e2e8f0;border-radius:12px;padding:16px;background:#fff}
+  </style>
+</head>
+<body>
+  <header class="container"><strong>Generated App</strong></header>
+  <section class="hero"><div class="container"><h1>Your App Is Live</h1><p>This default landing page ensures you always deploy something visible.</p><p><a class="btn" href="#features">Explore Features</a></p></div></section>
+  <main class="container" id="features" style="padding:40px 24px;">
+    <h2>Features</h2>
+    <div class="grid" style="margin-top:16px;">
+      <div class="card"><h3>Fast</h3><p>Ready for static hosting.</p></div>
+      <div class="card"><h3>Modern</h3><p>Built with best practices.</p></div>
+      <div class="card"><h3>Extensible</h3><p>Easily add components and logic.</p></div>
+    </div>
+  </main>
+  <footer class="container">Generated by WebAppGenerator</footer>
+</body>
+</html>
+""".encode("utf-8")
+_DEFAULT_CSS_BYTES = b"/* default styles */\nbody{font-family:Inter,system-ui,-apple-system,'Segoe UI',Roboto,Ubuntu}\n"
+
+@functools.lru_cache(maxsize=8)
+def _vite_config_bytes(base: str) -> bytes:
+    """vite.config.ts for a given Pages base path (the only scaffold file that varies per repo)"""
+    return (
+        'import { defineConfig } from "vite";\n'
+        'import react from "@vitejs/plugin-react";\n'
+        f'export default defineConfig({{ base: "{base}", plugins: [react()] }});\n'
+    ).encode("utf-8")
 
 class WebAppGenerator:
     def __init__(self, config: Config):
         self.config = config
         self.ai = AIClient(config)
+        # Pooled session for GitHub API calls and Pages probes: one TLS handshake for the whole
+        # wait loop, and transient gateway errors are retried. Auth headers stay per request so
+        # the token is never sent to the github.io site itself.
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(
+            pool_connections=4, pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        ))
+        # Built once; the Pages wait loop sends it on every poll
+        self._gh_headers: Dict[str, str] = {
+            "Authorization": f"token {config.github_token}", "Accept": "application/vnd.github.v3+json"
+        } if config.github_token else {}
+        # GitHub GET responses by (URL, Authorization): (ETag, parsed body). Revalidated with
+        # If-None-Match; a 304 costs no rate-limit quota and skips the JSON parse.
+        self._gh_etags: Dict[Tuple[str, str], Tuple[str, object]] = {}
         self.output_dir = Path(config.output_dir)
-        self.requirements: Dict = {}
+        # Resolved once: path checks run per file, and a later chdir must not move the root
+        self._out_root = self.output_dir.resolve()
+        # Optional HTML parsers, probed (and installed if needed) at most once per run
+        self._bs4 = None
+        self._bs4_checked = False
+        self._selectolax = None
+        self._selectolax_checked = False
+        # Serializes file writes from concurrent build todos
+        self._write_lock = threading.Lock()
+        # sanitized relative path -> _safe_join result under output_dir, for names seen again on retries
+        self._joined: Dict[str, Path] = {}
+        # sanitized relative path -> (SHA-1, mtime_ns, size) of the file as last seen, to skip identical
+        # rewrites; the stat part catches files changed since by other passes
+        self._written_hashes: Dict[str, Tuple[bytes, int, int]] = {}
+        # (fingerprint, buckets) from the last _bucket_files() walk
+        self._walk_cache: Optional[Tuple[int, Dict[str, List[Path]]]] = None
+        # Per-file progress lines, written to stdout in batches by _flush_log()
+        self._log_buf: List[str] = []
+        self._log_size = 0
+        self._log_lock = threading.Lock()
+        # Unparseable responses, appended to debug_response.txt once per stage
+        self._debug_buffer: List[str] = []
+        self.requirements = {}
+        self._last_req_hash: Optional[bytes] = None
         self.deployed_url: Optional[str] = None
         
+    @property
+    def requirements(self) -> Dict:
+        return self._requirements
+
+    @requirements.setter
+    def requirements(self, value: Dict):
+        # Serialized once per assignment; every build/test prompt embeds the same text
+        self._requirements = value
+        self._requirements_json = _dump_json_bytes(value).decode("utf-8")
+
     def show_example(self):
         """Display example sentences"""
         examples = [
@@ -235,26 +994,69 @@ class WebAppGenerator:
     # Environment helpers and auto-install
     # -------------
 
+    # pip distribution name -> import name, where they differ
+    PIP_IMPORT_NAMES = {"beautifulsoup4": "bs4", "pytest-playwright": "pytest_playwright"}
+
     def _ensure_python_packages(self, packages: List[str]) -> bool:
-        ok = True
-        for name in packages:
-            mod_name = "bs4" if name == "beautifulsoup4" else name
-            try:
-                __import__(mod_name)
-            except ImportError:
-                print(f"   ℹ️  Installing missing package: {name} ...")
-                res = subprocess.run([sys.executable, "-m", "pip", "install", name], text=True)
-                if res.returncode != 0:
-                    print(f"   ❌ Failed to install {name} (pip exited {res.returncode})")
-                    ok = False
-        return ok
+        missing = [name for name in packages
+                   if importlib.util.find_spec(self.PIP_IMPORT_NAMES.get(name, name)) is None]
+        if not missing:
+            return True
+        # One pip run for everything missing: interpreter and resolver startup are paid once
+        print(f"   ℹ️  Installing missing package(s): {', '.join(missing)} ...")
+        res = subprocess.run([sys.executable, "-m", "pip", "install", "--quiet", "--disable-pip-version-check",
+                              "--no-input", *missing], text=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if res.returncode != 0:
+            print(f"   ❌ Failed to install {', '.join(missing)} (pip exited {res.returncode})")
+            if res.stderr:
+                print(res.stderr.strip())
+            return False
+        importlib.invalidate_caches()
+        return True
 
     def _ensure_bs4(self) -> bool:
+        if not self._bs4_checked:
+            self._bs4_checked = True
+            if self._ensure_python_packages(["beautifulsoup4"]):
+                try:
+                    import bs4  # type: ignore
+                    self._bs4 = bs4
+                except ImportError:
+                    pass
+                else:
+                    # Best effort: _soup() falls back to html.parser without it
+                    self._ensure_python_packages(["lxml"])
+        return self._bs4 is not None
+
+    def _soup(self, text: str):
+        """BeautifulSoup tree using the C lxml parser, or the pure-Python html.parser if lxml is missing"""
         try:
-            import bs4  # type: ignore
-            return True
-        except Exception:
-            return self._ensure_python_packages(["beautifulsoup4"])
+            return self._bs4.BeautifulSoup(text, "lxml")
+        except self._bs4.FeatureNotFound:
+            return self._bs4.BeautifulSoup(text, "html.parser")
+
+    def _selectolax_parser(self):
+        """selectolax's compiled (lexbor) HTML parser class, installing it if needed; None if unavailable"""
+        if not self._selectolax_checked:
+            self._selectolax_checked = True
+            self._selectolax = self._probe_selectolax()
+        return self._selectolax
+
+    def _probe_selectolax(self):
+        for attempt in range(2):
+            try:
+                from selectolax.lexbor import LexborHTMLParser  # type: ignore
+                return LexborHTMLParser
+            except ImportError:
+                pass
+            try:
+                from selectolax.parser import HTMLParser  # type: ignore  # selectolax < 1.0
+                return HTMLParser
+            except ImportError:
+                pass
+            if attempt == 0 and not self._ensure_python_packages(["selectolax"]):
+                break
+        return None
 
     def _ensure_playwright_stack(self) -> bool:
         # Install pytest, pytest-playwright, playwright
@@ -288,7 +1090,7 @@ class WebAppGenerator:
 
     def _safe_join(self, base: Path, *paths: str) -> Path:
         candidate = base.joinpath(*paths).resolve()
-        base_resolved = base.resolve()
+        base_resolved = self._out_root if base == self.output_dir else base.resolve()
         try:
             if not candidate.is_relative_to(base_resolved):  # type: ignore[attr-defined]
                 raise ValueError("Path traversal detected")
@@ -298,47 +1100,156 @@ class WebAppGenerator:
         return candidate
 
     def _sanitize_filepath(self, raw: str) -> Optional[str]:
-        if not raw:
-            return None
-        s = raw.strip().strip('`"\'')
-        s = s.replace("\\", "/")
-        s = re.split(r"\s+\(|`", s, maxsplit=1)[0].strip()
-        s = re.sub(r"^(?:file:|filename:)\s*", "", s, flags=re.IGNORECASE)
-        s = re.sub(r"[^A-Za-z0-9._\-/]", "", s)
-        s = re.sub(r"/{2,}", "/", s)
-        s = s.lstrip("/.")
-        if not s:
-            return None
-        p = Path(s)
-        if p.suffix.lower() not in ALLOWED_EXTENSIONS:
-            return None
-        parts = p.parts
-        if len(parts) > 1 and parts[0] not in ALLOWED_TOP_DIRS:
-            ext = p.suffix.lower()
-            if ext in {".css"}:
-                p = Path("css") / p.name
-            elif ext in {".js", ".ts", ".tsx", ".jsx"}:
-                p = Path("src") / p.name if self.config.stack == "react" else Path("js") / p.name
-            elif ext in {".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg", ".webp"}:
-                p = Path("assets") / p.name
-            else:
-                p = Path(p.name)
-        # Return POSIX-style path
-        return str(p).replace("\\", "/")
+        return _sanitize_filepath_cached(raw, self.config.stack)
 
     def _list_all_files(self, start: Path) -> List[Path]:
         return [p for p in start.rglob("*") if p.is_file() and ".git" not in str(p)]
 
+    @staticmethod
+    def _read_texts(paths: List[Path]) -> List[Optional[str]]:
+        """Read many small files concurrently; None where a read failed. Order matches paths."""
+        def read(p: Path) -> Optional[str]:
+            try:
+                return p.read_text(encoding="utf-8", errors="ignore")
+            except Exception:
+                return None
+        if len(paths) < 2:
+            return [read(p) for p in paths]
+        with ThreadPoolExecutor(max_workers=min(32, len(paths))) as ex:
+            return list(ex.map(read, paths))
+
+    @staticmethod
+    def _preview_files(root: Path, n: int) -> Tuple[int, List[str]]:
+        """
+        (count, first n relative paths in Path order) of the files _list_all_files(root) would list,
+        from one os.walk that prunes .git and never builds the full sorted list
+        """
+        total = 0
+
+        def rels():
+            nonlocal total
+            for dirpath, dirs, files in os.walk(root):
+                dirs[:] = [d for d in dirs if ".git" not in d]
+                rel_dir = os.path.relpath(dirpath, root)
+                for name in files:
+                    if ".git" not in name:
+                        total += 1
+                        yield name if rel_dir == "." else f"{rel_dir}/{name}"
+
+        preview = heapq.nsmallest(n, rels(), key=lambda rel: rel.split("/"))
+        return total, preview
+
+    def _fs_fingerprint(self) -> int:
+        """Newest mtime_ns of output_dir and the entries of its top two levels (creating a file bumps its dir)"""
+        newest = 0
+        try:
+            newest = self.output_dir.stat().st_mtime_ns
+            with os.scandir(self.output_dir) as top:
+                for entry in top:
+                    newest = max(newest, entry.stat(follow_symlinks=False).st_mtime_ns)
+                    if entry.is_dir(follow_symlinks=False) and entry.name != ".git":
+                        with os.scandir(entry.path) as sub:
+                            for child in sub:
+                                newest = max(newest, child.stat(follow_symlinks=False).st_mtime_ns)
+        except OSError:
+            return -1
+        return newest
+
+    def _bucket_files(self) -> Dict[str, List[Path]]:
+        """
+        Every file under output_dir (same filter as _list_all_files), grouped by lowercased extension.
+        Reused while _fs_fingerprint() is unchanged and _save_file has not written since; treat as read-only.
+        """
+        fp = self._fs_fingerprint()
+        if self._walk_cache is not None and self._walk_cache[0] == fp and fp != -1:
+            return self._walk_cache[1]
+        buckets: Dict[str, List[Path]] = defaultdict(list)
+        for dirpath, dirs, files in os.walk(self.output_dir):
+            if ".git" in dirpath:
+                dirs[:] = []
+                continue
+            for name in files:
+                if ".git" not in name:
+                    buckets[os.path.splitext(name)[1].lower()].append(Path(dirpath, name))
+        self._walk_cache = (fp, buckets)
+        return buckets
+
+    @staticmethod
+    def _copy_tree_fast(src: Path, dst: Path):
+        """
+        Copy every file under src to the same relative path under dst. The tree is listed with
+        os.scandir before anything is written (dst may contain src), each target directory is
+        created once, and the copy2 calls run on a thread pool; the first failure is re-raised.
+        """
+        pairs: List[Tuple[str, str]] = []
+        dirs: List[str] = []
+        stack = [(str(src), str(dst))]
+        while stack:
+            sdir, ddir = stack.pop()
+            has_files = False
+            with os.scandir(sdir) as it:
+                for entry in it:
+                    target = os.path.join(ddir, entry.name)
+                    if entry.is_dir():
+                        stack.append((entry.path, target))
+                    elif entry.is_file():
+                        pairs.append((entry.path, target))
+                        has_files = True
+            if has_files:
+                dirs.append(ddir)
+        for d in dirs:
+            os.makedirs(d, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for fut in [pool.submit(shutil.copy2, s, d) for s, d in pairs]:
+                fut.result()
+
+    @staticmethod
+    def _rmtree_parallel(path: Path):
+        """Remove a tree like shutil.rmtree(ignore_errors=True), unlinking the files on a thread pool"""
+        def _quiet(fn, p):
+            try:
+                fn(p)
+            except OSError:
+                pass
+
+        walked = list(os.walk(path, topdown=False))
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            for root, dirs, files in walked:
+                for name in files:
+                    pool.submit(_quiet, os.unlink, os.path.join(root, name))
+                # os.walk lists symlinks to directories as dirs but never descends into them
+                for name in dirs:
+                    full = os.path.join(root, name)
+                    if os.path.islink(full):
+                        pool.submit(_quiet, os.unlink, full)
+        for root, _, _ in walked:
+            _quiet(os.rmdir, root)
+
     def _choose_best_app_dir(self) -> Optional[Path]:
-        candidates: List[Tuple[int, Path]] = []
-        for idx in self.output_dir.rglob("index.html"):
-            app_dir = idx.parent
-            files = self._list_all_files(app_dir)
-            candidates.append((len(files), app_dir))
-        if not candidates:
+        """The directory holding an index.html with the most files beneath it, from one os.walk"""
+        counts: Dict[str, int] = {}
+        index_dirs: List[str] = []
+        for dirpath, dirs, files in os.walk(self.output_dir):
+            if ".git" in dirpath:
+                dirs[:] = []
+                continue
+            if "index.html" in files:
+                index_dirs.append(dirpath)
+            # Same filter as _list_all_files, so the counts match what it would return
+            counts[dirpath] = sum(1 for f in files if ".git" not in f)
+        if not index_dirs:
             return None
-        candidates.sort(reverse=True, key=lambda x: x[0])
-        return candidates[0][1]
+        # Roll each directory's own count up into every ancestor to get subtree totals
+        root = os.fspath(self.output_dir)
+        totals = dict.fromkeys(counts, 0)
+        for dirpath, n in counts.items():
+            d = dirpath
+            while d in totals:
+                totals[d] += n
+                if d == root:
+                    break
+                d = os.path.dirname(d)
+        return Path(max(index_dirs, key=lambda d: totals[d]))
 
     # -------------
     # package.json helpers (React)
@@ -349,14 +1260,14 @@ class WebAppGenerator:
         if not pkg.exists():
             return None
         try:
-            return json.loads(pkg.read_text(encoding="utf-8"))
+            return _load_json_bytes(pkg.read_bytes())
         except Exception as e:
             print(f"   ⚠️  Could not read package.json: {e}")
             return None
 
     def _save_package_json(self, data: Dict):
         try:
-            (self.output_dir / "package.json").write_text(json.dumps(data, indent=2), encoding="utf-8")
+            (self.output_dir / "package.json").write_bytes(_dump_json_bytes(data))
             print("   💾 Updated package.json")
         except Exception as e:
             print(f"   ❌ Failed to write package.json: {e}")
@@ -441,39 +1352,57 @@ class WebAppGenerator:
             "vite": ("devDependencies", "vite", "^5.4.8"),
             "typescript": ("devDependencies", "typescript", "^5.6.2")
         }
-        import_re = re.compile(r'^\s*import\s+(?:[^"\']+from\s+)?[\'"]([^\'"]+)[\'"]', re.MULTILINE)
+        # Only known modules missing from package.json can change it; stop once none is left to find
+        missing = {mod for mod, (which, pkg_name, _) in known.items() if pkg_name not in pkg[which]}
         src_dir = self.output_dir / "src"
         found_modules = set()
-        for p in src_dir.rglob("*"):
-            if p.suffix.lower() not in (".ts", ".tsx", ".jsx", ".js"):
+        paths = [p for p in src_dir.rglob("*") if p.suffix.lower() in (".ts", ".tsx", ".jsx", ".js")] if missing else []
+        # Reads overlap in threads; the regex pass stays on this thread
+        for text in self._read_texts(paths):
+            if text is None:
                 continue
-            try:
-                text = p.read_text(encoding="utf-8", errors="ignore")
-                for m in import_re.findall(text):
-                    if not m.startswith("."):
-                        found_modules.add(m)
-            except Exception:
-                pass
-        changed = False
+            for m in _IMPORT_RE.finditer(text):
+                mod = m.group(1)
+                if mod in missing:
+                    missing.discard(mod)
+                    found_modules.add(mod)
+            if not missing:
+                break
         for m in found_modules:
-            if m in known:
-                which, pkg_name, ver = known[m]
-                if pkg_name not in pkg[which]:
-                    pkg[which][pkg_name] = ver
-                    changed = True
-        if changed:
+            which, pkg_name, ver = known[m]
+            pkg[which][pkg_name] = ver
+        if found_modules:
             self._save_package_json(pkg)
         else:
             print("   ✅ No new dependencies needed from import scan")
 
     # -------------
-    # Asset handling (bs4 preferred, regex fallback)
+    # Asset handling (selectolax preferred, then bs4, regex fallback)
     # -------------
 
     def _rewrite_asset_paths_to_relative(self):
+        html_parser = self._selectolax_parser()
+        if html_parser is not None:
+            html_files = list(self.output_dir.rglob("*.html"))
+            for html, text in zip(html_files, self._read_texts(html_files)):
+                try:
+                    if text is None:
+                        raise OSError("unreadable")
+                    tree = html_parser(text)
+                    for tag in tree.css("img[src], script[src]"):
+                        u = tag.attributes["src"]
+                        if u and not u.startswith(("http://", "https://", "data:", "mailto:", "#")):
+                            tag.attrs["src"] = u.lstrip("/")
+                    for tag in tree.css("link[href]"):
+                        u = tag.attributes["href"]
+                        if u and not u.startswith(("http://", "https://", "data:", "mailto:", "#")):
+                            tag.attrs["href"] = u.lstrip("/")
+                    html.write_text(tree.html, encoding="utf-8")
+                except Exception as e:
+                    print(f"   ⚠️  Could not rewrite asset paths in {html}: {e}")
+            return
         if self._ensure_bs4():
             try:
-                import bs4  # type: ignore
                 html_files = list(self.output_dir.rglob("*.html"))
                 if not html_files:
                     return
@@ -483,10 +1412,11 @@ class WebAppGenerator:
                     if u.startswith("/"):
                         u = u.lstrip("/")
                     return u
-                for html in html_files:
+                for html, text in zip(html_files, self._read_texts(html_files)):
                     try:
-                        text = html.read_text(encoding="utf-8", errors="ignore")
-                        soup = bs4.BeautifulSoup(text, "html.parser")
+                        if text is None:
+                            raise OSError("unreadable")
+                        soup = self._soup(text)
                         for tag in soup.find_all("img"):
                             if tag.has_attr("src"):
                                 tag["src"] = fix_url(tag["src"])
@@ -507,36 +1437,57 @@ class WebAppGenerator:
         html_files = list(self.output_dir.rglob("*.html"))
         if not html_files:
             return
-        src_re = re.compile(r'(\s(src|href)\s*=\s*[\'"])/([^\'"]+)')
-        for html in html_files:
+        for html, txt in zip(html_files, self._read_texts(html_files)):
             try:
-                txt = html.read_text(encoding="utf-8", errors="ignore")
-                new_txt = src_re.sub(r'\1\3', txt)
-                if new_txt != txt:
+                if txt is None:
+                    raise OSError("unreadable")
+                new_txt, n = _REWRITE_RE.subn(r'\1\2', txt)
+                if n:
                     html.write_text(new_txt, encoding="utf-8")
             except Exception as e:
                 print(f"   ⚠️  Regex rewrite failed in {html}: {e}")
 
     def _collect_asset_refs(self) -> List[Path]:
         refs: List[Path] = []
+        html_parser = self._selectolax_parser()
+        if html_parser is not None:
+            html_files = list(self.output_dir.rglob("*.html"))
+            for html, text in zip(html_files, self._read_texts(html_files)):
+                try:
+                    if text is None:
+                        raise OSError("unreadable")
+                    tree = html_parser(text)
+                    urls = [t.attributes.get("src") for t in tree.css("img, script")]
+                    urls += [u for u in (t.attributes.get("href") for t in tree.css("link, a"))
+                             if u and u.lower().endswith(ASSET_EXTENSIONS)]
+                    for u in urls:
+                        if not u or u.startswith(("http://", "https://", "data:", "mailto:", "#")):
+                            continue
+                        p = (html.parent / u.lstrip("/")).resolve()
+                        if p.is_relative_to(self._out_root):
+                            refs.append(p)
+                except Exception as e:
+                    print(f"   ⚠️  Asset parse failed in {html}: {e}")
+            return refs
         if self._ensure_bs4():
             try:
-                import bs4  # type: ignore
-                for html in self.output_dir.rglob("*.html"):
+                html_files = list(self.output_dir.rglob("*.html"))
+                for html, text in zip(html_files, self._read_texts(html_files)):
                     try:
-                        text = html.read_text(encoding="utf-8", errors="ignore")
-                        soup = bs4.BeautifulSoup(text, "html.parser")
+                        if text is None:
+                            raise OSError("unreadable")
+                        soup = self._soup(text)
                         def add_if_local(u: Optional[str]):
                             if not u or u.startswith(("http://", "https://", "data:", "mailto:", "#")):
                                 return
                             p = (html.parent / u.lstrip("/")).resolve()
-                            if str(p).startswith(str(self.output_dir.resolve())):
+                            if p.is_relative_to(self._out_root):
                                 refs.append(p)
                         for t in soup.find_all(["img", "script"]):
                             add_if_local(t.get("src"))
                         for t in soup.find_all(["link", "a"]):
                             u = t.get("href")
-                            if u and any(u.lower().endswith(ext) for ext in [".css",".js",".png",".jpg",".jpeg",".gif",".ico",".svg",".webp"]):
+                            if u and u.lower().endswith(ASSET_EXTENSIONS):
                                 add_if_local(u)
                     except Exception as e:
                         print(f"   ⚠️  Asset parse failed in {html}: {e}")
@@ -546,17 +1497,18 @@ class WebAppGenerator:
         # regex fallback
         print("   ℹ️  Using regex-based asset scan fallback.")
         attr_re = re.compile(r'(?:src|href)\s*=\s*[\'"]([^\'"]+)[\'"]', re.IGNORECASE)
-        for html in self.output_dir.rglob("*.html"):
+        html_files = list(self.output_dir.rglob("*.html"))
+        for html, txt in zip(html_files, self._read_texts(html_files)):
             try:
-                txt = html.read_text(encoding="utf-8", errors="ignore")
+                if txt is None:
+                    raise OSError("unreadable")
                 for u in attr_re.findall(txt):
                     if u.startswith(("http://", "https://", "data:", "mailto:", "#")):
                         continue
-                    if not any(u.lower().endswith(ext) for ext in (".css",".js",".png",".jpg",".jpeg",".gif",".ico",".svg",".webp")):
+                    if not u.lower().endswith(ASSET_EXTENSIONS):
                         continue
                     p = (html.parent / u.lstrip("/")).resolve()
-                    out_root = self.output_dir.resolve()
-                    if str(p).startswith(str(out_root)):
+                    if p.is_relative_to(self._out_root):
                         refs.append(p)
             except Exception as e:
                 print(f"   ⚠️  Regex asset scan failed in {html}: {e}")
@@ -584,30 +1536,36 @@ class WebAppGenerator:
         if not site_url:
             return False
         try:
-            r = requests.get(site_url, timeout=20, allow_redirects=True)
+            r = self.ai.session.get(site_url, timeout=20, allow_redirects=True)
             if r.status_code != 200:
                 print(f"   ❌ Live index fetch failed: {r.status_code}")
                 return False
-            try:
-                import bs4  # type: ignore
-            except Exception:
+            if not self._ensure_bs4():
                 print("   ℹ️  Skipping live image checks (install beautifulsoup4).")
                 return True
             import urllib.parse
-            soup = __import__("bs4").BeautifulSoup(r.text, "html.parser")
+            soup = self._soup(r.text)
             imgs = [img.get("src") for img in soup.find_all("img")]
             imgs = [u for u in imgs if u and not u.startswith(("data:", "mailto:", "#"))]
+            def check(full: str):
+                # HEAD is enough to prove the asset is served; fall back to GET where it is refused
+                ar = self.ai.session.head(full, timeout=10, allow_redirects=True)
+                if ar.status_code in (405, 501):
+                    ar = self.ai.session.get(full, timeout=10, allow_redirects=True)
+                return ar.status_code
+            urls = [urllib.parse.urljoin(site_url.rstrip("/") + "/", u) for u in imgs[:10]]
             ok = True
-            for u in imgs[:10]:
-                full = urllib.parse.urljoin(site_url.rstrip("/") + "/", u)
-                try:
-                    ar = requests.get(full, timeout=10, allow_redirects=True)
-                    if ar.status_code != 200:
-                        print(f"   ❌ Live asset failed: {full} -> {ar.status_code}")
+            with ThreadPoolExecutor(max_workers=8) as ex:
+                futures = [(full, ex.submit(check, full)) for full in urls]
+                for full, fut in futures:
+                    try:
+                        status = fut.result()
+                        if status != 200:
+                            print(f"   ❌ Live asset failed: {full} -> {status}")
+                            ok = False
+                    except Exception as e:
+                        print(f"   ❌ Live asset exception: {full} -> {e}")
                         ok = False
-                except Exception as e:
-                    print(f"   ❌ Live asset exception: {full} -> {e}")
-                    ok = False
             if ok: print("   ✅ Live smoke-test passed (index + sample images)")
             return ok
         except Exception as e:
@@ -619,7 +1577,6 @@ class WebAppGenerator:
     # -------------
 
     def _ensure_react_scaffold_and_workflow(self):
-        pkg = self.output_dir / "package.json"
         src_dir = self.output_dir / "src"
         ghwf_dir = self.output_dir / ".github" / "workflows"
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -630,129 +1587,33 @@ class WebAppGenerator:
         if self.config.github_username and self.config.github_repo:
             if self.config.github_repo != f"{self.config.github_username}.github.io":
                 base = f"/{self.config.github_repo}/"
-        vite_cfg = (
-            'import { defineConfig } from "vite";\n'
-            'import react from "@vitejs/plugin-react";\n'
-            f'export default defineConfig({{ base: "{base}", plugins: [react()] }});\n'
-        )
-        (self.output_dir / "vite.config.ts").write_text(vite_cfg, encoding="utf-8")
-
-        tailwind_cfg = (
-            'module.exports = {\n'
-            '  content: ["./index.html", "./src/**/*.{ts,tsx,jsx,js}"],\n'
-            '  theme: { extend: {} },\n'
-            '  plugins: [require("tailwindcss-animate")],\n'
-            '};\n'
-        )
-        (self.output_dir / "tailwind.config.js").write_text(tailwind_cfg, encoding="utf-8")
-        (self.output_dir / "postcss.config.js").write_text('module.exports = { plugins: { tailwindcss: {}, autoprefixer: {} } };\n', encoding="utf-8")
-
-        index_html = (
-            '<!doctype html>\n<html lang="en">\n  <head>\n'
-            '    <meta charset="UTF-8" />\n'
-            '    <meta name="viewport" content="width=device-width, initial-scale=1.0" />\n'
-            '    <title>App</title>\n'
-            '    <link rel="preconnect" href="https://fonts.googleapis.com">\n'
-            '    <link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>\n'
-            '    <link href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap" rel="stylesheet">\n'
-            '  </head>\n  <body>\n    <div id="root"></div>\n    <script type="module" src="/src/main.tsx"></script>\n  </body>\n</html>\n'
-        )
-        (self.output_dir / "index.html").write_text(index_html, encoding="utf-8")
-        (self.output_dir / "src" / "index.css").write_text("@tailwind base;\n@tailwind components;\n@tailwind utilities;\n", encoding="utf-8")
-        main_tsx = (
-            'import React from "react";\nimport ReactDOM from "react-dom/client";\nimport "./index.css";\nimport App from "./App";\n\nReactDOM.createRoot(document.getElementById("root")!).render(\n  <React.StrictMode>\n    <App />\n  </React.StrictMode>\n);\n'
-        )
-        (self.output_dir / "src" / "main.tsx").write_text(main_tsx, encoding="utf-8")
-        app_tsx = (
-            'import React from "react";\nimport { LucideCheckSquare } from "lucide-react";\nexport default function App(){\n  return (\n    <div className="min-h-screen bg-white text-slate-900">\n      <div className="mx-auto max-w-3xl p-6">\n        <header className="py-8">\n          <h1 className="text-3xl font-bold flex items-center gap-2">\n            <LucideCheckSquare className="w-7 h-7" />\n            App Starter\n          </h1>\n          <p className="mt-2 text-slate-600">React + Tailwind scaffold. The generator/LLM will expand this.</p>\n        </header>\n        <main className="space-y-6">\n          <section className="p-6 rounded-lg border bg-slate-50">\n            <h2 className="text-xl font-semibold">Getting Started</h2>\n            <p className="mt-2 text-slate-600">Add components and logic. This content ensures the site is never blank.</p>\n          </section>\n        </main>\n        <footer className="mt-12 text-sm text-slate-500">Generated by WebAppGenerator</footer>\n      </div>\n    </div>\n  );\n}\n'
-        )
-        (self.output_dir / "src" / "App.tsx").write_text(app_tsx, encoding="utf-8")
-        (self.output_dir / "tsconfig.json").write_text('{\n  "compilerOptions": {\n    "target": "ES2020", "useDefineForClassFields": true, "lib": ["ES2020","DOM","DOM.Iterable"],\n    "module": "ESNext", "skipLibCheck": true, "jsx": "react-jsx", "moduleResolution": "Bundler",\n    "resolveJsonModule": true, "isolatedModules": true, "noEmit": true, "esModuleInterop": true,\n    "strict": true, "noUncheckedIndexedAccess": true, "forceConsistentCasingInFileNames": true\n  },\n  "include": ["src"]\n}\n', encoding="utf-8")
-
+        writes: List[Tuple[Path, bytes]] = [
+            (self.output_dir / "vite.config.ts", _vite_config_bytes(base)),
+            (self.output_dir / "tailwind.config.js", _TAILWIND_CONFIG_BYTES),
+            (self.output_dir / "postcss.config.js", _POSTCSS_CONFIG_BYTES),
+            (self.output_dir / "index.html", _REACT_INDEX_HTML_BYTES),
+            (src_dir / "index.css", _INDEX_CSS_BYTES),
+            (src_dir / "main.tsx", _MAIN_TSX_BYTES),
+            (src_dir / "App.tsx", _APP_TSX_BYTES),
+            (self.output_dir / "tsconfig.json", _TSCONFIG_BYTES),
+            (ghwf_dir / "pages.yml", _PAGES_YML_BYTES),
+        ]
         if not (self.output_dir / "package.json").exists():
-            package_json = {
-                "name": "webapp",
-                "private": True,
-                "version": "0.0.0",
-                "type": "module",
-                "scripts": {"dev": "vite", "build": "vite build", "preview": "vite preview"},
-                "dependencies": {
-                    "react": "^18.3.1",
-                    "react-dom": "^18.3.1",
-                    "lucide-react": "^0.453.0",
-                    "@dnd-kit/core": "^6.1.0",
-                    "@dnd-kit/sortable": "^7.0.2",
-                    "@dnd-kit/modifiers": "6.0.2",
-                    "@nivo/core": "^0.86.0",
-                    "@nivo/line": "^0.86.0",
-                    "@nivo/bar": "^0.86.0",
-                    "@tanstack/react-table": "^8.20.5",
-                    "react-hook-form": "^7.52.1",
-                    "@hookform/resolvers": "^3.9.0",
-                    "zod": "^3.23.8",
-                    "date-fns": "^3.6.0",
-                    "react-day-picker": "^9.0.7"
-                },
-                "devDependencies": {
-                    "@types/react": "^18.3.3",
-                    "@types/react-dom": "^18.3.0",
-                    "@vitejs/plugin-react": "^4.3.1",
-                    "autoprefixer": "^10.4.20",
-                    "postcss": "^8.4.45",
-                    "tailwindcss": "^3.4.10",
-                    "tailwindcss-animate": "^1.0.7",
-                    "typescript": "^5.6.2",
-                    "vite": "^5.4.8"
-                }
-            }
-            (self.output_dir / "package.json").write_text(json.dumps(package_json, indent=2), encoding="utf-8")
-
+            writes.append((self.output_dir / "package.json", _PACKAGE_JSON_BYTES))
+        # The files are independent, so their open/write/close round trips overlap;
+        # package.json must be on disk before the dependency check reads it.
+        self._write_files(writes)
         self._ensure_react_dependencies()
-        pages_yml = (
-            "name: Deploy to GitHub Pages\n"
-            "on:\n"
-            "  push:\n"
-            "    branches: [ \"main\" ]\n"
-            "permissions:\n"
-            "  contents: read\n"
-            "  pages: write\n"
-            "  id-token: write\n"
-            "concurrency:\n"
-            "  group: pages\n"
-            "  cancel-in-progress: true\n"
-            "jobs:\n"
-            "  build:\n"
-            "    runs-on: ubuntu-latest\n"
-            "    steps:\n"
-            "      - uses: actions/checkout@v4\n"
-            "      - name: Setup Node\n"
-            "        uses: actions/setup-node@v4\n"
-            "        with:\n"
-            "          node-version: 20\n"
-            "      - name: Install dependencies\n"
-            "        run: |\n"
-            "          if [ -f package-lock.json ]; then\n"
-            "            npm ci\n"
-            "          else\n"
-            "            npm install\n"
-            "          fi\n"
-            "      - name: Build\n"
-            "        run: npm run build\n"
-            "      - name: Upload Pages artifact\n"
-            "        uses: actions/upload-pages-artifact@v3\n"
-            "        with:\n"
-            "          path: ./dist\n"
-            "  deploy:\n"
-            "    needs: build\n"
-            "    runs-on: ubuntu-latest\n"
-            "    environment:\n"
-            "      name: github-pages\n"
-            "      url: ${{ steps.deployment.outputs.page_url }}\n"
-            "    steps:\n"
-            "      - id: deployment\n"
-            "        uses: actions/deploy-pages@v4\n"
-        )
-        (self.output_dir / ".github" / "workflows" / "pages.yml").write_text(pages_yml, encoding="utf-8")
+
+    @staticmethod
+    def _write_files(writes: List[Tuple[Path, bytes]]):
+        """Write disjoint files from a small thread pool; re-raises the first failure"""
+        def write(item: Tuple[Path, bytes]):
+            path, data = item
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(write, writes))
 
     # -------------
     # Playwright E2E
@@ -778,7 +1639,12 @@ class WebAppGenerator:
                     '        browser.close()\n',
                     encoding="utf-8"
                 )
-            res = subprocess.run([sys.executable, "-m", "pytest", "-q", str(tests_dir)], cwd=self.output_dir, text=True)
+            # The smoke test drives sync_playwright itself, so no plugin needs loading: skipping
+            # entry-point autoload and the cache provider is most of pytest's startup time
+            res = subprocess.run(
+                [sys.executable, "-m", "pytest", "-q", "-x", "-p", "no:cacheprovider", "--no-header", str(tests_dir)],
+                cwd=self.output_dir, text=True, env={**os.environ, "PYTEST_DISABLE_PLUGIN_AUTOLOAD": "1"}
+            )
             return res.returncode == 0
         except Exception as e:
             print(f"   ⚠️  Playwright E2E run failed: {e}")
@@ -800,96 +1666,81 @@ class WebAppGenerator:
                 pass
         if need:
             idx.parent.mkdir(parents=True, exist_ok=True)
-            skeleton = """<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="utf-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>Landing - Generated App</title>
-  <link rel="stylesheet" href="css/styles.css">
-  <style>
-    body{font-family:Inter,system-ui,-apple-system,Segoe UI,Roboto,Ubuntu;margin:0}
-    .container{max-width:1000px;margin:0 auto;padding:24px}
-    .hero{padding:64px 24px;background:#f8fafc}
-    .btn{background:#38bdf8;color:#0f172a;padding:12px 18px;border-radius:8px;text-decoration:none;font-weight:600}
-    .grid{display:grid;gap:16px;grid-template-columns:repeat(auto-fit,minmax(220px,1fr))}
-    .card{border:1px solid #e2e8f0;border-radius:12px;padding:16px;background:#fff}
-  </style>
-</head>
-<body>
-  <header class="container"><strong>Generated App</strong></header>
-  <section class="hero"><div class="container"><h1>Your App Is Live</h1><p>This default landing page ensures you always deploy something visible.</p><p><a class="btn" href="#features">Explore Features</a></p></div></section>
-  <main class="container" id="features" style="padding:40px 24px;">
-    <h2>Features</h2>
-    <div class="grid" style="margin-top:16px;">
-      <div class="card"><h3>Fast</h3><p>Ready for static hosting.</p></div>
-      <div class="card"><h3>Modern</h3><p>Built with best practices.</p></div>
-      <div class="card"><h3>Extensible</h3><p>Easily add components and logic.</p></div>
-    </div>
-  </main>
-  <footer class="container">Generated by WebAppGenerator</footer>
-</body>
-</html>
-"""
-            idx.write_text(skeleton, encoding="utf-8")
-            print("   🧱 Added fallback landing skeleton (basic).")
+            idx.write_bytes(_SKELETON_HTML_BYTES)
+            self._log("   🧱 Added fallback landing skeleton (basic).")
         css = self.output_dir / "css" / "styles.css"
         if not css.exists():
             css.parent.mkdir(parents=True, exist_ok=True)
-            css.write_text("/* default styles */\nbody{font-family:Inter,system-ui,-apple-system,'Segoe UI',Roboto,Ubuntu}\n", encoding="utf-8")
+            css.write_bytes(_DEFAULT_CSS_BYTES)
+        self._flush_log()
 
     def _ensure_minimum_content_react(self):
         if not (self.output_dir / "src" / "App.tsx").exists():
             self._ensure_react_scaffold_and_workflow()
-            print("   🧱 Ensured React scaffold exists (fallback).")
+            self._log("   🧱 Ensured React scaffold exists (fallback).")
+        self._flush_log()
 
     # -------------
     # Build/Test/Deploy pipeline
     # -------------
     # Summarization helpers to manage context size
 
+    @staticmethod
+    def _head_lines(data: bytes, n: int) -> List[str]:
+        """
+        Lines of data up to and including its n-th newline, decoding only that prefix rather than
+        the whole file. Never fewer than the file's first n lines (lone CR breaks can add more).
+        """
+        end = -1
+        for _ in range(n):
+            end = data.find(b"\n", end + 1)
+            if end < 0:
+                break
+        head = data if end < 0 else data[:end + 1]
+        return head.decode("utf-8", "ignore").splitlines()
+
     def _summarize_code_for_llm(self, path: Path, max_lines: int = 120) -> str:
         try:
-            text = path.read_text(encoding="utf-8", errors="ignore")
+            data = path.read_bytes()
         except Exception:
             return ""
         suffix = path.suffix.lower()
-        lines = text.splitlines()
         if suffix in (".ts", ".tsx", ".js", ".jsx"):
+            # Signature lines are searched for within the first max_lines*8 lines only, so large
+            # bundles and generated files are never decoded in full
+            lines = self._head_lines(data, max_lines * 8)
             keep = []
-            import_re = re.compile(r'^\s*import\b')
-            export_re = re.compile(r'^\s*export\b')
-            func_re = re.compile(r'^\s*(?:export\s+)?(?:async\s+)?function\b')
-            const_func_re = re.compile(r'^\s*(?:export\s+)?const\s+[A-Za-z0-9_]+\s*=\s*(?:async\s*)?\(')
-            comp_re = re.compile(r'^\s*(?:export\s+)?(?:const|function)\s+[A-Z][A-Za-z0-9_]*\s*(?:[:=]|\()')
-            iface_re = re.compile(r'^\s*interface\s+[A-Za-z0-9_]+')
-            type_re = re.compile(r'^\s*type\s+[A-Za-z0-9_]+')
             for ln in lines:
-                if (import_re.match(ln) or export_re.match(ln) or func_re.match(ln) or
-                    const_func_re.match(ln) or comp_re.match(ln) or iface_re.match(ln) or type_re.match(ln)):
+                if (_SUMMARY_IMPORT_RE.match(ln) or _SUMMARY_EXPORT_RE.match(ln) or _SUMMARY_FUNC_RE.match(ln) or
+                    _SUMMARY_CONST_FUNC_RE.match(ln) or _SUMMARY_COMPONENT_RE.match(ln) or
+                    _SUMMARY_INTERFACE_RE.match(ln) or _SUMMARY_TYPE_RE.match(ln)):
                     keep.append(ln.strip())
                 if len(keep) >= max_lines:
                     break
             if not keep:
                 keep = lines[:max_lines]
             return "\n".join(keep)
-        head = "\n".join(lines[:max_lines])
-        return head
-
-    def _gather_code_summaries(self, max_files: int, max_lines: int, char_budget: int) -> List[Dict]:
-        all_files = sorted(self._list_all_files(self.output_dir))
-        ext_priority = {".tsx": 1, ".ts": 1, ".jsx": 1, ".js": 1, ".html": 2, ".css": 3, ".json": 4}
-        def prio(p: Path):
-            return ext_priority.get(p.suffix.lower(), 5), len(str(p))
-        candidates = sorted(all_files, key=prio)
+        return "\n".join(self._head_lines(data, max_lines)[:max_lines])
+
+    # Summarized source types, most informative first
+    SUMMARY_EXT_PRIORITY = {".tsx": 1, ".ts": 1, ".jsx": 1, ".js": 1, ".html": 2, ".css": 3, ".json": 4}
+
+    def _gather_code_summaries(self, max_files: int, max_lines: int, char_budget: int,
+                               buckets: Optional[Dict[str, List[Path]]] = None) -> List[Dict]:
+        if buckets is None:
+            buckets = self._bucket_files()
+        prio = self.SUMMARY_EXT_PRIORITY
+        # Only the top few can make it into the prompt: keep a bounded heap instead of sorting every
+        # file; over-fetch 4x so files with empty summaries don't starve the char-budget loop.
+        ranked = heapq.nsmallest(max_files * 4, ((rank, len(str(p)), p)
+                                                 for ext, rank in prio.items() for p in buckets.get(ext, ())))
+        candidates = [p for _, _, p in ranked]
         summaries = []
         total_chars = 0
         for p in candidates:
             if len(summaries) >= max_files:
                 break
             rel = str(p.relative_to(self.output_dir)) if self.output_dir in p.parents else str(p)
-            if p.suffix.lower() not in (".html", ".css", ".js", ".ts", ".tsx", ".jsx", ".json"):
-                continue
             summ = self._summarize_code_for_llm(p, max_lines=max_lines)
             if not summ.strip():
                 continue
@@ -919,30 +1770,42 @@ app_name, description, features, pages, design, tech_stack, content.
 Request: {sentence}"""
             else:
                 print("\nCurrent requirements:")
-                print(json.dumps(self.requirements, indent=2))
+                print(self._requirements_json)
                 user_input = input("\n✏️  Refine requirements (or 'approve' to continue): ").strip()
                 if user_input.lower() == "approve":
                     print("✅ Requirements approved!")
                     return True
-                prompt = f"""Current requirements: {json.dumps(self.requirements, indent=2)}
+                prompt = f"""Current requirements: {self._requirements_json}
 User feedback: {user_input}
 Update the requirements JSON."""
             resp = self.ai.call(prompt, system_prompt)
             try:
-                s, e = resp.find("{"), resp.rfind("}") + 1
-                if s >= 0 and e > s:
-                    self.requirements = json.loads(resp[s:e])
+                block = _slice_outer_json(resp)
+                if block:
+                    self.requirements = _load_json_bytes(block)
                 else:
                     print("⚠️  Could not parse AI response as JSON")
                     continue
             except Exception:
                 print("⚠️  Invalid JSON in AI response")
                 continue
-            (self.output_dir / "requirements.json").parent.mkdir(parents=True, exist_ok=True)
-            (self.output_dir / "requirements.json").write_text(json.dumps(self.requirements, indent=2), encoding="utf-8")
+            self._save_requirements()
         print("\n⚠️  Max iterations reached. Using current requirements.")
         return True
 
+    def _save_requirements(self):
+        """Persist requirements.json via write-then-rename, skipping refinements that changed nothing"""
+        data = self._requirements_json.encode("utf-8")
+        digest = hashlib.sha1(data).digest()
+        if digest == self._last_req_hash:
+            return
+        req_file = self.output_dir / "requirements.json"
+        req_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = req_file.with_name(req_file.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, req_file)
+        self._last_req_hash = digest
+
     def run_build_stage(self) -> bool:
         print(f"\n{'='*80}\n🔨 STAGE 2: BUILD\n{'='*80}\n")
         self.ai.reset_conversation()
@@ -950,13 +1813,12 @@ Update the requirements JSON."""
         print("📝 Creating build plan...")
         system_prompt = "You are a senior full-stack developer. Create a comprehensive build plan."
         stack_note = "React + TypeScript (Vite) under src/ and index.html at root." if self.config.stack == "react" else "Basic HTML/CSS/JS."
-        prompt = f"""Based on requirements: {json.dumps(self.requirements, indent=2)}
+        prompt = f"""Based on requirements: {self._requirements_json}
 Constraints: Stack={self.config.stack}. {stack_note}
 Return JSON array of todos: [{{title, description, acceptance_criteria:[]}}]."""
         resp = self.ai.call(prompt, system_prompt)
         try:
-            s, e = resp.find("["), resp.rfind("]") + 1
-            todos = json.loads(resp[s:e])
+            todos = _load_json_bytes(_slice_outer_json(resp, "[", "]"))
             for t in todos:
                 plan.add_todo(t.get("title", "Task"), t.get("description", ""), t.get("acceptance_criteria", []))
             plan.save()
@@ -967,16 +1829,53 @@ Return JSON array of todos: [{{title, description, acceptance_criteria:[]}}]."""
         if self.config.stack == "react":
             self._ensure_react_scaffold_and_workflow()
         completed = 0
-        for todo in plan.todos:
-            print(f"\n🔧 Working on: {todo['title']}\n   {todo['description']}")
-            stack_instr = ("For React: create files under src/ (tsx/ts/css). Use React+TS+Tailwind."
-                           if self.config.stack == "react" else
-                           "For Basic: provide static HTML/CSS/JS with relative assets.")
-            bprompt = f"""Complete this task:
+        workers = max(1, self.config.build_concurrency)
+        if workers == 1 or len(plan.todos) < 2:
+            for todo in plan.todos:
+                self._execute_todo(todo, lambda p: self.ai.call(p, system_prompt))
+                plan.complete_todo(todo["id"]); completed += 1
+        else:
+            # Todos mostly touch disjoint files: each gets its own copy of the planning conversation
+            # so the LLM round trips overlap, and completions are recorded here as they finish
+            print(f"⚡ Working on {len(plan.todos)} tasks, {workers} at a time")
+            base = list(self.ai.conversation_history)
+
+            def run(todo: Dict):
+                history = list(base)
+                self._execute_todo(todo, lambda p: self.ai.call_with_history(p, system_prompt, history))
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = {pool.submit(run, todo): todo for todo in plan.todos}
+                for fut in as_completed(futures):
+                    todo = futures[fut]
+                    try:
+                        fut.result()
+                    except Exception as ex:
+                        print(f"   ❌ Task '{todo['title']}' failed: {ex}")
+                        continue
+                    plan.complete_todo(todo["id"]); completed += 1
+        # Ensure fallback content exists
+        if self.config.stack == "react":
+            self._ensure_minimum_content_react()
+        else:
+            self._ensure_minimum_content_basic()
+        plan.flush()
+        self._flush_debug_responses()
+        print(f"\n✅ Build stage complete: {completed}/{len(plan.todos)} tasks finished")
+        return True
+
+    def _execute_todo(self, todo: Dict, ask: Callable[[str], str]):
+        """Build one todo: generate its files, re-ask once if none parsed, then check acceptance criteria"""
+        print(f"\n🔧 Working on: {todo['title']}\n   {todo['description']}")
+        stack_instr = ("For React: create files under src/ (tsx/ts/css). Use React+TS+Tailwind."
+                       if self.config.stack == "react" else
+                       "For Basic: provide static HTML/CSS/JS with relative assets.")
+        criteria = "\n".join('- ' + c for c in todo['acceptance_criteria'])
+        bprompt = f"""Complete this task:
 Task: {todo['title']}
 Acceptance Criteria:
-{chr(10).join('- ' + c for c in todo['acceptance_criteria'])}
-Requirements: {json.dumps(self.requirements, indent=2)}
+{criteria}
+Requirements: {self._requirements_json}
 {stack_instr}
 Provide files in EXACT format:
 
@@ -984,96 +1883,146 @@ FILENAME: path/to/file
 ```language
 file contents here
 ```"""
-            bresp = self.ai.call(bprompt, system_prompt)
-            saved = self._extract_and_save_files(bresp)
-            if saved == 0:
-                print("   ℹ️  Couldn’t parse files. Asking for explicit format...")
-                retry = f"""Provide files using EXACT format:
+        bresp = ask(bprompt)
+        saved = self._extract_and_save_files(bresp)
+        if saved == 0:
+            print("   ℹ️  Couldn’t parse files. Asking for explicit format...")
+            retry = f"""Provide files using EXACT format:
 FILENAME: path/to/file.tsx
 ```tsx
 // content
 ```
 Task: {todo['title']}"""
-                self._extract_and_save_files(self.ai.call(retry, system_prompt))
-            print("   ✓ Checking acceptance criteria...")
-            vprompt = f"""Review:
+            self._extract_and_save_files(ask(retry))
+        print("   ✓ Checking acceptance criteria...")
+        # Criteria about files on disk are answered locally; only the rest go to the LLM
+        checks = [(c, _local_verify(c, self._out_root)) for c in todo['acceptance_criteria']]
+        issues = [f"not met: {c}" for c, ok in checks if ok is False]
+        remaining = [c for c, ok in checks if ok is None]
+        if not remaining:
+            if issues:
+                print(f"   ⚠️  Issues: {', '.join(issues)}")
+            else:
+                print("   ✅ Task completed successfully")
+            return
+        vprompt = f"""Review:
 Task: {todo['title']}
 Acceptance Criteria:
-{chr(10).join('- ' + c for c in todo['acceptance_criteria'])}
+{chr(10).join('- ' + c for c in remaining)}
 Respond JSON: {{'met': true/false, 'issues': ['...']}}"""
-            vresp = self.ai.call(vprompt, system_prompt)
-            try:
-                s, e = vresp.find("{"), vresp.rfind("}") + 1
-                res = json.loads(vresp[s:e])
-                if res.get("met", False):
-                    print("   ✅ Task completed successfully")
-                else:
-                    print(f"   ⚠️  Issues: {', '.join(res.get('issues', []))}")
-                plan.complete_todo(todo["id"]); completed += 1
-            except Exception as ex:
-                print(f"   ✅ Task completed (verification unclear: {ex})")
-                plan.complete_todo(todo["id"]); completed += 1
-        # Ensure fallback content exists
-        if self.config.stack == "react":
-            self._ensure_minimum_content_react()
-        else:
-            self._ensure_minimum_content_basic()
-        print(f"\n✅ Build stage complete: {completed}/{len(plan.todos)} tasks finished")
-        return True
+        vresp = ask(vprompt)
+        try:
+            res = _load_json_bytes(_slice_outer_json(vresp))
+            if not res.get("met", False):
+                issues += res.get('issues', [])
+            if issues:
+                print(f"   ⚠️  Issues: {', '.join(issues)}")
+            else:
+                print("   ✅ Task completed successfully")
+        except Exception as ex:
+            print(f"   ✅ Task completed (verification unclear: {ex})")
 
     def _extract_and_save_files(self, response: str) -> int:
         files_saved = 0
-        pattern1 = r'FILENAME:\s*([^\n]+)\s*```[\w]*\n(.*?)```'
-        for filepath, content in re.findall(pattern1, response, re.DOTALL):
-            self._save_file(filepath.strip().strip('`'), content.rstrip()); files_saved += 1
-        pattern2 = r'```[\w]*\s*(?://|#|<!--)\s*([^\n]+?\.(?:html|css|js|json|svg|png|jpg|jpeg|gif|ico|ts|tsx|jsx|map|woff|woff2|webp))\s*(?:-->)?\s*\n(.*?)```'
-        for filepath, content in re.findall(pattern2, response, re.DOTALL):
-            if not (self.output_dir / filepath.strip()).exists():
-                self._save_file(filepath.strip(), content.rstrip()); files_saved += 1
-        pattern3 = r'#+\s*(?:File:|Filename:)?\s*`?([^\n]+?\.(?:html|css|js|json|svg|ts|tsx|jsx))`?\s*\n```[\w]*\n(.*?)```'
-        for filepath, content in re.findall(pattern3, response, re.DOTALL):
-            if not (self.output_dir / filepath.strip().strip('`')).exists():
-                self._save_file(filepath.strip().strip('`'), content.rstrip()); files_saved += 1
-        pattern4 = r'```[\w]*\s*\n(?:\/\/|#|<!--)?\s*([a-zA-Z0-9_\-\/\.]+\.(?:html|css|js|json|svg|png|jpg|jpeg|gif|ico|ts|tsx|jsx|map|woff|woff2|webp))\s*(?:-->)?\s*\n(.*?)```'
-        for filepath, content in re.findall(pattern4, response, re.DOTALL):
-            if not (self.output_dir / filepath.strip()).exists():
-                self._save_file(filepath.strip(), content.rstrip()); files_saved += 1
+        generic = []
+        for m in _FILE_BLOCKS_RE.finditer(response):
+            kind = m.lastgroup
+            if kind == "c1":
+                self._save_file(m["f1"].strip().strip('`'), m["c1"].rstrip()); files_saved += 1
+            elif kind == "c5":
+                generic.append((m["lang"], m["c5"]))
+            else:
+                # The looser formats never overwrite a file that already exists
+                n = kind[1]
+                filepath = m["f" + n].strip()
+                if n == "3":
+                    filepath = filepath.strip('`')
+                if not (self.output_dir / filepath).exists():
+                    self._save_file(filepath, m["c" + n].rstrip()); files_saved += 1
         if files_saved == 0:
-            blocks = re.findall(r'```(\w+)\n(.*?)```', response, re.DOTALL)
-            for lang, content in blocks:
-                if lang == "html" and "<html" in content.lower():
-                    self._save_file("index.html", content.rstrip()); files_saved += 1
-                elif lang == "css":
-                    self._save_file("css/styles.css", content.rstrip()); files_saved += 1
-                elif lang in ("javascript", "js"):
-                    self._save_file("js/script.js", content.rstrip()); files_saved += 1
-                elif lang in ("tsx", "typescript"):
-                    self._save_file("src/App.tsx", content.rstrip()); files_saved += 1
+            for lang, content in generic:
+                if lang == "html":
+                    if "<html" not in content.lower():
+                        continue
+                    target = "index.html"
+                else:
+                    target = _GENERIC_TARGETS.get(lang)
+                    if target is None:
+                        continue
+                self._save_file(target, content.rstrip()); files_saved += 1
         if files_saved == 0:
-            dbg = self.output_dir / "debug_response.txt"
-            dbg.parent.mkdir(parents=True, exist_ok=True)
-            with open(dbg, 'a', encoding='utf-8') as f:
-                f.write(f"\n\n{'='*80}\nResponse at {time.strftime('%Y-%m-%d %H:%M:%S')}:\n{response}\n{'='*80}\n")
-            print("   ℹ️  No files extracted; saved raw response for debugging.")
+            self._debug_buffer.append(f"\n\n{'='*80}\nResponse at {time.strftime('%Y-%m-%d %H:%M:%S')}:\n{response}\n{'='*80}\n")
+            self._log("   ℹ️  No files extracted; saved raw response for debugging.")
+        self._flush_log()
         return files_saved
 
+    def _flush_debug_responses(self):
+        if not self._debug_buffer:
+            return
+        dbg = self.output_dir / "debug_response.txt"
+        dbg.parent.mkdir(parents=True, exist_ok=True)
+        with open(dbg, 'ab') as f:
+            f.write("".join(self._debug_buffer).encode("utf-8"))
+        self._debug_buffer.clear()
+
+    def _log(self, msg: str):
+        """print() for per-file progress lines: buffered and written in one call per ~4 KiB or _flush_log()"""
+        with self._log_lock:
+            self._log_buf.append(msg + "\n")
+            self._log_size += len(msg) + 1
+            if self._log_size < 4096:
+                return
+        self._flush_log()
+
+    def _flush_log(self):
+        with self._log_lock:
+            if not self._log_buf:
+                return
+            sys.stdout.write("".join(self._log_buf))
+            sys.stdout.flush()
+            self._log_buf.clear()
+            self._log_size = 0
+
     def _save_file(self, filepath: str, content: str):
         if not content or not content.strip():
-            print(f"   ⚠️  Skipped empty file: {filepath}")
+            self._log(f"   ⚠️  Skipped empty file: {filepath}")
             return
         sanitized = self._sanitize_filepath(filepath)
         if not sanitized:
-            print(f"   ℹ️  Skipped invalid path: {filepath}")
+            self._log(f"   ℹ️  Skipped invalid path: {filepath}")
             return
         if sanitized != filepath:
-            print(f"   ℹ️  Normalized filename: '{filepath}' -> '{sanitized}'")
+            self._log(f"   ℹ️  Normalized filename: '{filepath}' -> '{sanitized}'")
         try:
-            full = self._safe_join(self.output_dir, sanitized)
-            full.parent.mkdir(parents=True, exist_ok=True)
-            full.write_text(content, encoding="utf-8")
-            print(f"   💾 Saved: {sanitized} ({len(content)} chars)")
+            full = self._joined.get(sanitized)
+            if full is None:
+                full = self._joined[sanitized] = self._safe_join(self.output_dir, sanitized)
+            data = content.encode("utf-8")
+            digest = hashlib.sha1(data).digest()
+            with self._write_lock:
+                unchanged = False
+                try:
+                    st = full.stat()
+                except FileNotFoundError:
+                    st = None
+                if st is not None and st.st_size == len(data):
+                    known = self._written_hashes.get(sanitized)
+                    if known is None or known[1:] != (st.st_mtime_ns, st.st_size):
+                        known = (hashlib.sha1(full.read_bytes()).digest(), st.st_mtime_ns, st.st_size)
+                        self._written_hashes[sanitized] = known
+                    unchanged = known[0] == digest
+                if not unchanged:
+                    full.parent.mkdir(parents=True, exist_ok=True)
+                    full.write_bytes(data)
+                    self._walk_cache = None
+                    st = full.stat()
+                    self._written_hashes[sanitized] = (digest, st.st_mtime_ns, st.st_size)
+            if unchanged:
+                self._log(f"   ♻️  Unchanged: {sanitized}")
+                return
+            self._log(f"   💾 Saved: {sanitized} ({len(content)} chars)")
         except Exception as e:
-            print(f"   ❌ Failed to save '{filepath}' as '{sanitized}': {e}")
+            self._log(f"   ❌ Failed to save '{filepath}' as '{sanitized}': {e}")
 
     # -------------
     # Test stage (progressive summarization to avoid context limit)
@@ -1084,11 +2033,10 @@ Respond JSON: {{'met': true/false, 'issues': ['...']}}"""
         self.ai.reset_conversation()
         if not self.output_dir.exists():
             self.output_dir.mkdir(parents=True, exist_ok=True)
-        files = self._list_all_files(self.output_dir)
-        htmls = [f for f in files if f.suffix.lower() == ".html"]
-        csss = [f for f in files if f.suffix.lower() == ".css"]
-        js_like = [f for f in files if f.suffix.lower() in (".js", ".ts", ".tsx", ".jsx")]
-        print(f"📁 Files: HTML={len(htmls)}, CSS={len(csss)}, JS/TS/TSX/JSX={len(js_like)}, Total={len(files)}")
+        buckets = self._bucket_files()
+        js_like = sum(len(buckets.get(ext, ())) for ext in (".js", ".ts", ".tsx", ".jsx"))
+        total = sum(map(len, buckets.values()))
+        print(f"📁 Files: HTML={len(buckets.get('.html', ()))}, CSS={len(buckets.get('.css', ()))}, JS/TS/TSX/JSX={js_like}, Total={total}")
         if self.config.stack == "basic":
             print("🔧 Rewriting asset paths to relative (basic stack)...")
             self._rewrite_asset_paths_to_relative()
@@ -1104,27 +2052,19 @@ Respond JSON: {{'met': true/false, 'issues': ['...']}}"""
             print(f"\n🧪 LLM Test Iteration {iteration}/{max_iters}")
             features = []
             parsed_ok = False
-            for max_files, max_lines, char_budget in budgets:
-                file_summaries = self._gather_code_summaries(max_files, max_lines, char_budget)
-                test_plan_prompt = f"""Requirements:
-{json.dumps(self.requirements, indent=2)}
-
-Code summaries (compact): up to {max_files} files, {max_lines} lines each.
-{json.dumps(file_summaries, indent=2)}
-
-Tasks:
-- Identify features and generate at least 5 scenarios per feature that might fail.
-- Predict Pass/Fail for each scenario and explain why.
-- Return JSON only with shape:
-{{"features":[{{"name":"Feature","scenarios":[{{"name":"Scenario","steps":["..."],"expected":"...","prediction":"Pass|Fail","reason":"..."}}]}}],"summary":{{"passed":X,"failed":Y}}}}"""
-                response = self.ai.call(test_plan_prompt, system_prompt)
+            remaining = budgets
+            if self.config.ai_parallel_probes:
+                # Probe the two largest budgets together; the larger one wins whenever it parses
+                probed = self._probe_test_plan(budgets[:2], buckets, system_prompt)
+                if probed is not None:
+                    features, (max_files, max_lines, _) = probed
+                    parsed_ok = True
+                remaining = [] if parsed_ok else budgets[2:]
+            for max_files, max_lines, char_budget in remaining:
+                response = self.ai.call(self._test_plan_prompt(max_files, max_lines, char_budget, buckets),
+                                        system_prompt)
                 try:
-                    s, e = response.find("{"), response.rfind("}") + 1
-                    plan_json = json.loads(response[s:e])
-                    features = plan_json.get("features", [])
-                    failed = sum(1 for f in features for s in f.get("scenarios", []) if str(s.get("prediction","")).lower()=="fail")
-                    passed = sum(1 for f in features for s in f.get("scenarios", []) if str(s.get("prediction","")).lower()=="pass")
-                    print(f"   Predicted: {passed} passed, {failed} failed (budget {max_files}x{max_lines})")
+                    features = self._parse_test_plan(response)
                     parsed_ok = True
                     break
                 except Exception:
@@ -1132,6 +2072,15 @@ Tasks:
             if not parsed_ok:
                 print("   ❌ Could not parse LLM test plan at any budget; skipping remaining iterations.")
                 break
+            passed = failed = 0
+            for feat in features:
+                for sc in feat.get("scenarios", ()):
+                    pred = str(sc.get("prediction", "")).lower()
+                    if pred == "pass":
+                        passed += 1
+                    elif pred == "fail":
+                        failed += 1
+            print(f"   Predicted: {passed} passed, {failed} failed (budget {max_files}x{max_lines})")
             if failed == 0 and passed > 0:
                 print("   ✅ All scenarios predicted to pass.")
                 all_passed = True
@@ -1143,20 +2092,22 @@ FILENAME: path/to/file
 <full file content>
 ```
 Failing scenarios context:
-{json.dumps(features, indent=2)}"""
+{_dump_json_bytes(features).decode("utf-8")}"""
             fix_resp = self.ai.call(fix_prompt, system_prompt)
             saved = self._extract_and_save_files(fix_resp)
             print(f"   🔧 Applied {saved} fix file(s).")
+            if saved:
+                buckets = self._bucket_files()
+        self._flush_debug_responses()
         if not all_passed:
             print("   ⚠️  Tests did not fully pass; proceeding with best effort.")
         # Optional E2E local (basic)
         if self.config.e2e and self.config.stack == "basic":
             print("\n🧪 Running local Playwright E2E (basic stack)...")
             try:
-                import threading
                 from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
-                os.chdir(self.output_dir)
-                server = ThreadingHTTPServer(("127.0.0.1", 8000), SimpleHTTPRequestHandler)
+                handler = functools.partial(SimpleHTTPRequestHandler, directory=str(self._out_root))
+                server = ThreadingHTTPServer(("127.0.0.1", 8000), handler)
                 t = threading.Thread(target=server.serve_forever, daemon=True); t.start()
                 ok = self._run_playwright_e2e("http://127.0.0.1:8000")
                 server.shutdown()
@@ -1166,6 +2117,52 @@ Failing scenarios context:
         print("\n✅ Test stage complete")
         return True
 
+    def _test_plan_prompt(self, max_files: int, max_lines: int, char_budget: int,
+                          buckets: Dict[str, List[Path]]) -> str:
+        file_summaries = self._gather_code_summaries(max_files, max_lines, char_budget, buckets)
+        return f"""Requirements:
+{self._requirements_json}
+
+Code summaries (compact): up to {max_files} files, {max_lines} lines each.
+{_dump_json_bytes(file_summaries).decode("utf-8")}
+
+Tasks:
+- Identify features and generate at least 5 scenarios per feature that might fail.
+- Predict Pass/Fail for each scenario and explain why.
+- Return JSON only with shape:
+{{"features":[{{"name":"Feature","scenarios":[{{"name":"Scenario","steps":["..."],"expected":"...","prediction":"Pass|Fail","reason":"..."}}]}}],"summary":{{"passed":X,"failed":Y}}}}"""
+
+    @staticmethod
+    def _parse_test_plan(response: str) -> List[Dict]:
+        return _load_json_bytes(_slice_outer_json(response)).get("features", [])
+
+    def _probe_test_plan(self, budgets: List[Tuple[int, int, int]], buckets: Dict[str, List[Path]],
+                         system_prompt: str) -> Optional[Tuple[List[Dict], Tuple[int, int, int]]]:
+        """
+        Request test plans for several budgets (largest first) at once against the current history
+        and return (features, budget) for the largest one that parses; that exchange joins the
+        history. A smaller budget's result is used only when every larger one failed.
+        """
+        base = list(self.ai.conversation_history)
+
+        def probe(budget: Tuple[int, int, int]):
+            prompt = self._test_plan_prompt(*budget, buckets)
+            history = list(base)
+            response = self.ai.call_with_history(prompt, system_prompt, history)
+            return self._parse_test_plan(response), history[-2:]
+
+        with ThreadPoolExecutor(max_workers=len(budgets)) as pool:
+            futures = [(pool.submit(probe, b), b) for b in budgets]
+            for fut, budget in futures:
+                try:
+                    features, turn = fut.result()
+                except Exception:
+                    print(f"   ℹ️  Parsing failed at budget {budget[0]}x{budget[1]}; trying smaller budget...")
+                    continue
+                self.ai.conversation_history.extend(turn)
+                return features, budget
+        return None
+
     # -------------
     # Document stage
     # -------------
@@ -1175,20 +2172,31 @@ Failing scenarios context:
         self.ai.reset_conversation()
         plan = WorkPlan(Stage.DOCUMENT, self.output_dir)
         plan.add_todo("Create README.md", "Create comprehensive project documentation",
-                      ["README.md exists", "Contains setup instructions", "Contains features list"])
+                      ["README.md exists", "Contains setup instructions", "Contains features list"],
+                      interactive=False)
         plan.save()
+        system_prompt = "You are a technical writer. Create clear, comprehensive documentation."
+        stack_section = ("React + TypeScript + Vite + Tailwind; GitHub Actions build for Pages."
+                         if self.config.stack == "react" else "Basic HTML/CSS/JS deployed to GitHub Pages.")
+        prompts = {}
         for todo in plan.todos:
             print(f"\n📝 Creating: {todo['title']}")
-            system_prompt = "You are a technical writer. Create clear, comprehensive documentation."
-            stack_section = ("React + TypeScript + Vite + Tailwind; GitHub Actions build for Pages."
-                             if self.config.stack == "react" else "Basic HTML/CSS/JS deployed to GitHub Pages.")
-            prompt = f"""Create README.md:
-{json.dumps(self.requirements, indent=2)}
+            prompts[todo["id"]] = f"""Create README.md:
+{self._requirements_json}
 Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File structure, Technologies, License (MIT)"""
-            response = self.ai.call(prompt, system_prompt)
+        # Non-interactive todos need no back-and-forth, so they can go out as one batch
+        batched = [t for t in plan.todos if not t.get("interactive", True)]
+        responses = dict(zip((t["id"] for t in batched),
+                             self.ai.call_many([prompts[t["id"]] for t in batched], system_prompt)))
+        for todo in plan.todos:
+            response = responses[todo["id"]] if todo["id"] in responses else self.ai.call(prompts[todo["id"]], system_prompt)
+            if not response:
+                print(f"   ⚠️  No response for {todo['title']}")
+                continue
             (self.output_dir / "README.md").write_text(response, encoding="utf-8")
             print("   ✅ Created README.md")
             plan.complete_todo(todo["id"])
+        plan.flush()
         return plan.is_complete()
 
     # -------------
@@ -1269,14 +2277,9 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
                     self._ensure_minimum_content_basic()
                 else:
                     print(f"   Found index.html in: {best}; copying to root...")
-                    for item in best.rglob("*"):
-                        if item.is_file():
-                            rel = item.relative_to(best)
-                            dest = self.output_dir / rel
-                            dest.parent.mkdir(parents=True, exist_ok=True)
-                            shutil.copy2(item, dest)
+                    self._copy_tree_fast(best, self.output_dir)
                     if best != self.output_dir:
-                        shutil.rmtree(best, ignore_errors=True)
+                        self._rmtree_parallel(best)
             if not (self.output_dir / "index.html").exists():
                 self._ensure_minimum_content_basic()
             (self.output_dir / ".nojekyll").write_text("", encoding="utf-8")
@@ -1284,15 +2287,12 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
             plan.complete_todo(1)
         # Git init and commit
         print("\n🧩 Initializing Git repository...")
-        os.chdir(self.output_dir)
         try:
-            subprocess.run(["git", "init"], check=True, capture_output=True, text=True)
-            files = self._list_all_files(Path("."))
-            print(f"   Will commit {len(files)} files:")
-            for p in sorted(files)[:50]: print(f"   - {p}")
-            if len(files) > 50: print(f"   ... and {len(files)-50} more")
-            subprocess.run(["git", "add", "-A"], check=True, capture_output=True, text=True)
-            subprocess.run(["git", "commit", "-m", "Deploy commit"], capture_output=True, text=True)
+            self._git_commit_all(self.output_dir, "Deploy commit")
+            total, preview = self._staged_files_preview(self._out_root, 50)
+            print(f"   Staged {total} files:")
+            for p in preview: print(f"   - {p}")
+            if total > 50: print(f"   ... and {total-50} more")
             print("   ✅ Local git repo ready")
             plan.complete_todo(2)
         except subprocess.CalledProcessError as e:
@@ -1301,9 +2301,9 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
         # Create / verify repo via API
         print("\n🌐 Creating/verifying GitHub repository...")
         try:
-            headers = {"Authorization": f"token {self.config.github_token}", "Accept": "application/vnd.github.v3+json"}
+            headers = self._gh_headers
             data = {"name": self.config.github_repo, "description": self.requirements.get("description", "Generated web app"), "private": False, "auto_init": False}
-            resp = requests.post("https://api.github.com/user/repos", headers=headers, json=data)
+            resp = self.http.post("https://api.github.com/user/repos", headers=headers, json=data, timeout=30)
             if resp.status_code in [201, 422]:
                 print("   ✅ GitHub repository ready")
                 plan.complete_todo(3)
@@ -1315,22 +2315,27 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
         print("\n⬆️  Pushing to GitHub...")
         try:
             remote_url = f"https://{self.config.github_token}@github.com/{self.config.github_username}/{self.config.github_repo}.git"
-            remotes = subprocess.run(["git", "remote"], capture_output=True, text=True)
-            if "origin" in remotes.stdout.split():
-                subprocess.run(["git", "remote", "set-url", "origin", remote_url], check=True, capture_output=True, text=True)
-            else:
-                subprocess.run(["git", "remote", "add", "origin", remote_url], check=True, capture_output=True, text=True)
-            subprocess.run(["git", "branch", "-M", "main"], check=True, capture_output=True, text=True)
-            if allow_force_push:
-                print("   ⚠️  User opted to wipe repository: force pushing (with lease)...")
-                push = subprocess.run(["git", "push", "--force", "origin", "main"], text=True, capture_output=True)
-            else:
-                push = subprocess.run(["git", "push", "-u", "origin", "main"], text=True, capture_output=True)
-            if push.returncode != 0:
-                print("   ⚠️  Push error:", push.stderr.strip())
-            else:
-                print("   ✅ Pushed to GitHub")
+            self._git_set_origin_main(self.output_dir, remote_url)
+            local_sha = self._git_head_sha(self.output_dir)
+            if local_sha and local_sha == self._remote_main_sha():
+                print("   ✅ Remote main already at local HEAD; nothing to push")
                 plan.complete_todo(4)
+            else:
+                # pack.threads=0: delta-compress with every core; push.useBitmaps: let pack-objects
+                # count objects from reachability bitmaps when the repo has them
+                git_push = ["git", "-c", "pack.threads=0", "-c", "push.useBitmaps=true", "push"]
+                if allow_force_push:
+                    print("   ⚠️  User opted to wipe repository: force pushing (with lease)...")
+                    push = subprocess.run(git_push + ["--force", "origin", "main"],
+                                          cwd=self.output_dir, text=True, capture_output=True)
+                else:
+                    push = subprocess.run(git_push + ["-u", "origin", "main"],
+                                          cwd=self.output_dir, text=True, capture_output=True)
+                if push.returncode != 0:
+                    print("   ⚠️  Push error:", push.stderr.strip())
+                else:
+                    print("   ✅ Pushed to GitHub")
+                    plan.complete_todo(4)
         except subprocess.CalledProcessError as e:
             print(f"   ⚠️  Push failed: {e}")
         # Provider-specific finalize
@@ -1344,26 +2349,47 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
             site_url = f"https://{self.config.github_username}.github.io/{self.config.github_repo}"
             if self.config.github_repo == f"{self.config.github_username}.github.io":
                 site_url = f"https://{self.config.github_username}.github.io"
-            max_wait, interval, elapsed = (600 if self.config.stack == "react" else 180), 10, 0
+            # React deploys through the Actions workflow, so its run is the real signal; the basic
+            # stack is built by Pages itself
+            react = self.config.stack == "react"
+            head_sha = self._git_head_sha(self.output_dir) if react else None
+            # Back off from 5s towards 60s; GitHub's X-Poll-Interval, when sent, takes precedence
+            max_wait, interval, elapsed, cycle, live = (600 if react else 180), 5.0, 0.0, 0, False
+            status = None
             while elapsed < max_wait:
-                time.sleep(interval); elapsed += interval
-                status = self._get_pages_build_status(self.config.github_username, self.config.github_repo, self.config.github_token)
+                time.sleep(interval); elapsed += interval; cycle += 1
+                if react:
+                    run, poll_hint = self._get_latest_workflow_run(self.config.github_username, self.config.github_repo, head_sha)
+                    status = None
+                    if run:
+                        status = run.get("status")
+                        if status == "completed":
+                            status = "built" if run.get("conclusion") == "success" else "errored"
+                else:
+                    status, poll_hint = self._get_pages_build_status(self.config.github_username, self.config.github_repo, self.config.github_token)
+                interval = max(float(poll_hint), 5.0) if poll_hint else min(interval * 1.5, 60.0)
                 if status:
-                    print(f"   ⏳ Pages status: {status} ({elapsed}s)")
+                    print(f"   ⏳ {'Actions run' if react else 'Pages'} status: {status} ({elapsed:.0f}s)")
                     if status == "errored":
-                        print("   ❌ Pages build errored. Check repository Settings → Pages → Build logs.")
-                        break
-                try:
-                    head = requests.head(site_url, timeout=10, allow_redirects=True)
-                    if head.status_code == 200:
-                        print(f"   ✅ Site is live at: {site_url}")
-                        plan.complete_todo(len(plan.todos))
+                        if react:
+                            print(f"   ❌ Deploy workflow concluded '{run.get('conclusion')}'. See {run.get('html_url', 'the Actions tab')}.")
+                        else:
+                            print("   ❌ Pages build errored. Check repository Settings → Pages → Build logs.")
                         break
-                except Exception:
-                    pass
-            if plan.todos[-1]["status"] != "completed":
+                if status == "built":
+                    # The site 404s until the CDN catches up, which is usually seconds after the build
+                    live = self._wait_until_live(site_url, 60.0)
+                    break
+                # Without any Pages status to go on, fall back to probing every other cycle
+                if status is None and not react and cycle % 2 == 0 and self._site_is_up(site_url):
+                    live = True
+                    break
+            if live:
+                print(f"   ✅ Site is live at: {site_url}")
+                plan.complete_todo(len(plan.todos))
+                self.deployed_url = site_url
+            elif status != "errored":
                 print("   ⚠️  Timed out waiting for Pages. It may still complete shortly.")
-            self.deployed_url = site_url
             print("\n🌐 Running live smoke test...")
             self._smoke_test_live_site(site_url or "")
         elif deploy_provider == "vercel":
@@ -1377,35 +2403,191 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
             print("\n🧪 Running Playwright E2E against deployed site...")
             ok = self._run_playwright_e2e(self.deployed_url)
             print("   ✅ Deployed E2E passed" if ok else "   ⚠️  Deployed E2E failed")
+        plan.flush()
         return plan.is_complete()
-    def _get_pages_build_status(self, owner: str, repo: str, token: Optional[str]) -> Optional[str]:
+
+    def _git_commit_all(self, workdir: Path, message: str):
+        """
+        git init + add -A + commit in workdir. In-process through pygit2 when it is installed
+        (no commit if the tree is unchanged); otherwise, or if pygit2 fails (e.g. no committer
+        identity configured), the git CLI. CLI init/add errors raise CalledProcessError.
+        """
+        if pygit2 is not None:
+            try:
+                repo = pygit2.init_repository(str(workdir))
+                index = repo.index
+                index.add_all()
+                for entry in list(index):  # add -A also stages deletions
+                    if not (workdir / entry.path).exists():
+                        index.remove(entry.path)
+                index.write()
+                tree = index.write_tree()
+                parents = [] if repo.head_is_unborn else [repo.head.target]
+                if parents and repo[parents[0]].tree_id == tree:
+                    return
+                sig = repo.default_signature
+                repo.create_commit("HEAD", sig, sig, message, tree, parents)
+                return
+            except Exception as e:
+                print(f"   ℹ️  pygit2 commit failed ({e}); using git CLI")
+        # Only stderr is captured, for CalledProcessError; stdout is never read
+        subprocess.run(["git", "init"], cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        subprocess.run(["git", "add", "-A"], cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        subprocess.run(["git", "commit", "-m", message], cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def _staged_files_preview(self, workdir: Path, n: int) -> Tuple[int, List[str]]:
+        """
+        (count, first n paths) of what git tracks after add -A, read from the index (pygit2) or
+        `git ls-files -z` instead of walking the tree; falls back to the walk if neither works.
+        """
+        paths: Optional[List[str]] = None
+        if pygit2 is not None:
+            try:
+                paths = [entry.path for entry in pygit2.Repository(str(workdir)).index]
+            except Exception:
+                paths = None
+        if paths is None:
+            res = subprocess.run(["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                                 cwd=workdir, capture_output=True)
+            if res.returncode != 0:
+                return self._preview_files(workdir, n)
+            paths = res.stdout.decode("utf-8", "surrogateescape").split("\0")[:-1]
+        return len(paths), heapq.nsmallest(n, paths, key=lambda rel: rel.split("/"))
+
+    @staticmethod
+    def _git_head_sha(workdir: Path) -> Optional[str]:
+        if pygit2 is not None:
+            try:
+                repo = pygit2.Repository(str(workdir))
+                return None if repo.head_is_unborn else str(repo.head.target)
+            except Exception:
+                pass
+        res = subprocess.run(["git", "rev-parse", "HEAD"], cwd=workdir, capture_output=True, text=True)
+        return res.stdout.strip() if res.returncode == 0 else None
+
+    def _gh_get_json(self, url: str, headers: Dict[str, str], timeout: float = 10):
+        """
+        GET a GitHub API URL through the ETag cache. Returns (response, body): body is the parsed JSON
+        on 200, the cached body on 304, and None for any other status.
+        """
+        key = (url, headers.get("Authorization", ""))
+        cached = self._gh_etags.get(key)
+        if cached:
+            headers = {**headers, "If-None-Match": cached[0]}
+        resp = self.http.get(url, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and cached:
+            return resp, cached[1]
+        if resp.status_code != 200:
+            return resp, None
+        data = _load_json_bytes(resp.content)
+        etag = resp.headers.get("ETag")
+        if etag:
+            self._gh_etags[key] = (etag, data)
+        return resp, data
+
+    def _remote_main_sha(self) -> Optional[str]:
+        """Commit sha of main on GitHub via the (ETag-cached) refs API; None if unknown or absent"""
+        url = f"https://api.github.com/repos/{self.config.github_username}/{self.config.github_repo}/git/ref/heads/main"
+        try:
+            _, data = self._gh_get_json(url, self._gh_headers)
+            return (data or {}).get("object", {}).get("sha")
+        except Exception:
+            return None
+
+    def _git_set_origin_main(self, workdir: Path, remote_url: str):
+        """Point origin at remote_url and name the current branch main (pygit2 when available, else git CLI)"""
+        if pygit2 is not None:
+            try:
+                repo = pygit2.Repository(str(workdir))
+                if "origin" in repo.remotes.names():
+                    repo.remotes.set_url("origin", remote_url)
+                else:
+                    repo.remotes.create("origin", remote_url)
+                if not repo.head_is_unborn and repo.head.shorthand != "main":
+                    repo.branches.local[repo.head.shorthand].rename("main", True)
+                return
+            except Exception as e:
+                print(f"   ℹ️  pygit2 remote setup failed ({e}); using git CLI")
+        remotes = subprocess.run(["git", "remote"], cwd=workdir, capture_output=True, text=True)
+        if "origin" in remotes.stdout.split():
+            subprocess.run(["git", "remote", "set-url", "origin", remote_url], cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        else:
+            subprocess.run(["git", "remote", "add", "origin", remote_url], cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        subprocess.run(["git", "branch", "-M", "main"], cwd=workdir, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    def _get_latest_workflow_run(self, owner: str, repo: str,
+                                 head_sha: Optional[str] = None) -> Tuple[Optional[Dict], Optional[int]]:
+        """
+        Latest Actions workflow run on main (for head_sha, when given) via the ETag-cached API.
+        Returns (run, poll_interval); run carries status ("queued", "in_progress", "completed")
+        and conclusion, and is None when there is no run yet or the request failed.
+        """
+        if not owner or not repo or not self.config.github_token:
+            return None, None
+        url = f"https://api.github.com/repos/{owner}/{repo}/actions/runs?per_page=1&branch=main"
+        if head_sha:
+            url += f"&head_sha={head_sha}"
+        try:
+            resp, data = self._gh_get_json(url, self._gh_headers)
+            hint = resp.headers.get("X-Poll-Interval")
+            poll = int(hint) if hint and hint.isdigit() else None
+            if data is None:
+                if resp.status_code != 404:
+                    print(f"   ⚠️  GitHub Actions API returned {resp.status_code}: {resp.text[:400]}")
+                return None, poll
+            runs = data.get("workflow_runs") or []
+            return (runs[0] if runs else None), poll
+        except Exception as e:
+            print(f"   ⚠️  Error fetching workflow runs: {e}")
+            return None, None
+
+    def _site_is_up(self, url: str) -> bool:
+        try:
+            return self.http.head(url, timeout=10, allow_redirects=True).status_code == 200
+        except Exception:
+            return False
+
+    def _wait_until_live(self, url: str, budget: float) -> bool:
+        """Probe the site every second until it answers 200 or the budget runs out."""
+        deadline = time.monotonic() + budget
+        while not self._site_is_up(url):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(1)
+        return True
+
+    def _get_pages_build_status(self, owner: str, repo: str, token: Optional[str]) -> Tuple[Optional[str], Optional[int]]:
         """
         Query GitHub Pages latest build status for owner/repo.
-        Returns one of: "building", "built", "errored", "pending", etc., or None on error.
+        Returns (status, poll_interval): status is one of "building", "built", "errored", "pending", etc.,
+        or None on error; poll_interval is GitHub's X-Poll-Interval advice in seconds, if sent.
         Requires self.config.github_token or token passed in.
         """
         if not owner or not repo:
-            return None
+            return None, None
         tok = token or self.config.github_token
         if not tok:
-            return None
+            return None, None
         url = f"https://api.github.com/repos/{owner}/{repo}/pages/builds/latest"
-        headers = {"Authorization": f"token {tok}", "Accept": "application/vnd.github.v3+json"}
+        headers = self._gh_headers if tok == self.config.github_token else {
+            "Authorization": f"token {tok}", "Accept": "application/vnd.github.v3+json"
+        }
         try:
-            resp = requests.get(url, headers=headers, timeout=10)
-            if resp.status_code == 200:
-                data = resp.json()
+            resp, data = self._gh_get_json(url, headers)
+            hint = resp.headers.get("X-Poll-Interval")
+            poll = int(hint) if hint and hint.isdigit() else None
+            if data is not None:
                 # The API returns a build object with a `status` field
-                return data.get("status")
+                return data.get("status"), poll
             # 404 indicates no build yet
             if resp.status_code == 404:
-                return None
+                return None, poll
             # For other statuses, print debug info and return None
             print(f"   ⚠️  GitHub Pages API returned {resp.status_code}: {resp.text[:400]}")
-            return None
+            return None, poll
         except Exception as e:
             print(f"   ⚠️  Error fetching Pages build status: {e}")
-            return None
+            return None, None
     
 
     # -------------
@@ -1441,8 +2623,7 @@ Include: Title/description, Features, Stack: {stack_section}, Setup, Usage, File
 def load_config() -> Config:
     cfg_file = Path.home() / ".webappgen" / "config.json"
     if cfg_file.exists():
-        with open(cfg_file, 'r', encoding='utf-8') as f:
-            cfg = json.load(f)
+        cfg = _load_json_bytes(cfg_file.read_bytes())
     else:
         cfg = {}
     provider = os.getenv("AI_PROVIDER", cfg.get("provider", "anthropic")).lower()
@@ -1464,14 +2645,27 @@ def load_config() -> Config:
         stack=os.getenv("WEBAPP_STACK", cfg.get("stack", "basic")).lower(),
         e2e=bool(cfg.get("e2e", False)),
         e2e_deployed=bool(cfg.get("e2e_deployed", False)),
+        max_concurrency=int(cfg.get("max_concurrency", 8)),
+        build_concurrency=int(cfg.get("build_concurrency", 4)),
+        ai_parallel_probes=bool(cfg.get("ai_parallel_probes", False)),
+        batch_api=bool(cfg.get("batch_api", False)),
+        batch_poll_interval=float(cfg.get("batch_poll_interval", 10.0)),
+        cache=bool(cfg.get("cache", True)),
+        prompt_caching=bool(cfg.get("prompt_caching", True)),
+        history_token_budget=int(cfg.get("history_token_budget", 8000)),
+        stream=bool(cfg.get("stream", True)),
+        request_timeout=tuple(float(t) for t in cfg.get("request_timeout", (10.0, 120.0))),
+        rpm_limit=int(cfg.get("rpm_limit", 500)),
     )
 
 def save_config(config: Config):
     cdir = Path.home() / ".webappgen"
     cdir.mkdir(exist_ok=True)
     cfile = cdir / "config.json"
-    with open(cfile, 'w', encoding='utf-8') as f:
-        json.dump(asdict(config), f, indent=2)
+    # Write-then-rename: an interrupted save must not leave a truncated config behind
+    tmp = cfile.with_name(cfile.name + ".tmp")
+    tmp.write_bytes(_dump_json_bytes(asdict(config)))
+    os.replace(tmp, cfile)
     print(f"✅ Configuration saved to {cfile}")
 
 def main():
@@ -1488,6 +2682,8 @@ def main():
     parser.add_argument("--stack", choices=["basic", "react"], help="Web app stack")
     parser.add_argument("--e2e", action="store_true", help="Run local Playwright E2E (basic stack only)")
     parser.add_argument("--e2e-deployed", action="store_true", help="Run Playwright E2E against deployed site")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the AI provider; skip the local response cache")
+    parser.add_argument("--batch-api", action="store_true", help="Send non-interactive prompts (docs) through the provider Batch API (cheaper, slower)")
     args = parser.parse_args()
     config = load_config()
     if args.config:
@@ -1544,6 +2740,8 @@ def main():
     if args.stack: config.stack = args.stack
     if args.e2e: config.e2e = True
     if args.e2e_deployed: config.e2e_deployed = True
+    if args.batch_api: config.batch_api = True
+    if args.no_cache: config.cache = False
     if not config.api_key:
         print("❌ Error: API key not configured. Run with --config or set env vars.")
         sys.exit(1)